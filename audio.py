@@ -1,182 +1,833 @@
 import numpy as np
+import math
 import pyaudio
+import queue
+import random
 import time
 import threading
 import keyboard
-import matplotlib.pyplot as plt
-from scipy.io import wavfile
+from collections import OrderedDict
+from fractions import Fraction
+from audiogram import Audiogram
+from calibration import load_calibration
+from trial_log import TrialLogWriter
+
+# matplotlib and scipy are imported where they are first needed, they dominate startup time
+
+class ToneBank:
+    """Phase-correct tone tables with a bounded cache of ready-to-play stereo buffers"""
+    def __init__(self, sample_rate, max_buffers=256, corrections=None):
+        self.sample_rate = sample_rate
+        self.max_buffers = max_buffers
+        
+        # (ear, frequency) -> dB added to requested levels, from the station calibration
+        self.corrections = corrections or {}
+        
+        # One unit-amplitude table per frequency, stereo buffers in LRU order
+        self.tables = {}
+        self.buffers = OrderedDict()
+    
+    def period_table(self, frequency):
+        """Return a unit-amplitude table holding a whole number of periods"""
+        table = self.tables.get(frequency)
+        if table is None:
+            # Shortest length that ends exactly on a period boundary, so tiling stays in phase
+            cycles_per_sample = Fraction(frequency).limit_denominator(1000) / self.sample_rate
+            n = np.arange(cycles_per_sample.denominator)
+            table = np.sin(2 * np.pi * frequency * n / self.sample_rate).astype(np.float32)
+            self.tables[frequency] = table
+        return table
+    
+    def tone(self, frequency, n_samples, volume_db):
+        """Return a mono tone of n_samples scaled to volume_db"""
+        table = self.period_table(frequency)
+        repeats = -(-n_samples // len(table))
+        mono = np.tile(table, repeats)[:n_samples]
+        mono *= np.float32(10 ** (volume_db / 20))
+        return mono
+    
+    def stereo(self, frequency, ear, volume_db, n_samples):
+        """Return an interleaved stereo buffer with the tone routed to one ear"""
+        key = (frequency, ear, volume_db, n_samples)
+        buffer = self.buffers.get(key)
+        if buffer is not None:
+            self.buffers.move_to_end(key)
+            return buffer
+        
+        # Never ask for more than full scale, whatever the calibration says
+        level = min(volume_db + self.corrections.get((ear, frequency), 0.0), 0.0)
+        stereo = np.zeros((n_samples, 2), dtype=np.float32)
+        stereo[:, 0 if ear == 'left' else 1] = self.tone(frequency, n_samples, level)
+        buffer = stereo.reshape(-1)
+        buffer.flags.writeable = False  # Shared between presentations
+        
+        self.buffers[key] = buffer
+        if len(self.buffers) > self.max_buffers:
+            self.buffers.popitem(last=False)
+        return buffer
+    
+    def release(self, frequency, ear):
+        """Drop the cached stereo buffers of one (frequency, ear) condition"""
+        for key in [key for key in self.buffers if key[0] == frequency and key[1] == ear]:
+            del self.buffers[key]
+    
+    def prewarm(self, frequencies, ears=(), levels=(), n_samples=0):
+        """Build period tables, and optionally stereo buffers, ahead of playback"""
+        for frequency in frequencies:
+            self.period_table(frequency)
+            for ear in ears:
+                for level in levels:
+                    self.stereo(frequency, ear, level, n_samples)
+
+class AudioEngine:
+    """Persistent callback-mode output stream fed from a preallocated ring buffer"""
+    def __init__(self, p, sample_rate, channels=2, frames_per_buffer=256, capacity=2.0, device=None):
+        self.p = p
+        self.device = device  # PyAudio output device index, None for the default
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.capacity = int(sample_rate * capacity)
+        self.ring = np.zeros((self.capacity, channels), dtype=np.float32)
+        self.lock = threading.Lock()
+        
+        # Absolute index of the next frame handed to the device
+        self.read_frame = 0
+        
+        # Clock reference from the last callback: (frame, perf_counter_ns, output latency ns), None before the first
+        self.clock = None
+        self.running = threading.Event()
+        self.output_latency = 0.0
+        self.stream = None
+    
+    def start(self, timeout=1.0):
+        """Open the output stream once and keep it running, waits for the first callback to seed the clock"""
+        if self.stream is not None:
+            return
+        self.stream = self.p.open(
+            format=pyaudio.paFloat32,
+            channels=self.channels,
+            rate=self.sample_rate,
+            output=True,
+            frames_per_buffer=self.frames_per_buffer,
+            output_device_index=self.device,
+            stream_callback=self._callback
+        )
+        self.output_latency = self.stream.get_output_latency()
+        self.running.wait(timeout)
+    
+    def _callback(self, in_data, frame_count, time_info, status):
+        """Hand the next block of the ring to the device and clear it behind us"""
+        now_ns = time.perf_counter_ns()
+        
+        # Some host APIs report no DAC time, fall back to the stream latency
+        latency = time_info['output_buffer_dac_time'] - time_info['current_time']
+        if not 0 <= latency < 1:
+            latency = self.output_latency
+        
+        with self.lock:
+            start = self.read_frame % self.capacity
+            stop = start + frame_count
+            if stop <= self.capacity:
+                out = self.ring[start:stop].tobytes()
+                self.ring[start:stop] = 0
+            else:
+                wrap = stop - self.capacity
+                out = self.ring[start:].tobytes() + self.ring[:wrap].tobytes()
+                self.ring[start:] = 0
+                self.ring[:wrap] = 0
+            self.clock = (self.read_frame, now_ns, int(latency * 1e9))
+            self.read_frame += frame_count
+        self.running.set()
+        
+        return out, pyaudio.paContinue
+    
+    def enqueue(self, buffer, delay=0.0):
+        """Mix an interleaved buffer into the ring and return its onset frame"""
+        frames = buffer.reshape(-1, self.channels)
+        n = len(frames)
+        
+        with self.lock:
+            onset = self.read_frame + int(delay * self.sample_rate)
+            if onset + n - self.read_frame > self.capacity:
+                raise ValueError("Presentation does not fit in the ring buffer")
+            
+            start = onset % self.capacity
+            first = min(n, self.capacity - start)
+            self.ring[start:start + first] += frames[:first]
+            self.ring[:n - first] += frames[first:]
+        
+        return onset
+    
+    def frame_time_ns(self, frame):
+        """Estimate the perf_counter_ns at which a frame reaches the DAC"""
+        clock = self.clock
+        if clock is None:
+            # No callback yet, the next block starts playing about one output latency from now
+            clock = (self.read_frame, time.perf_counter_ns(), int(self.output_latency * 1e9))
+        ref_frame, ref_ns, latency_ns = clock
+        return ref_ns + latency_ns + (frame - ref_frame) * 1_000_000_000 // self.sample_rate
+    
+    def now_ns(self):
+        """Current time on the same clock as frame_time_ns"""
+        return time.perf_counter_ns()
+    
+    def close(self):
+        """Stop and close the output stream"""
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+class ResponseCapture:
+    """Keyboard hook that queues timestamped presses of the response key"""
+    def __init__(self, key='space'):
+        self.key = key
+        self.presses = queue.Queue()
+        self.hook = None
+    
+    def start(self):
+        """Install the keyboard hook"""
+        if self.hook is None:
+            self.hook = keyboard.on_press_key(self.key, self._on_press)
+    
+    def _on_press(self, event):
+        """Timestamp the press as early as possible, on the hook thread"""
+        self.presses.put(time.perf_counter_ns())
+    
+    def clear(self):
+        """Drop presses left over from earlier presentations"""
+        while True:
+            try:
+                self.presses.get_nowait()
+            except queue.Empty:
+                return
+    
+    def wait_for_response(self, onset_ns, deadline_ns):
+        """Return the reaction latency (ns) of the first press after onset, or None"""
+        while True:
+            remaining_ns = deadline_ns - time.perf_counter_ns()
+            if remaining_ns <= 0:
+                return None
+            try:
+                pressed_ns = self.presses.get(timeout=remaining_ns / 1e9)
+            except queue.Empty:
+                return None
+            # Presses before the tone reached the ear are anticipations, not responses
+            if pressed_ns >= onset_ns:
+                return pressed_ns - onset_ns
+    
+    def stop(self):
+        """Remove the keyboard hook"""
+        if self.hook is not None:
+            keyboard.unhook(self.hook)
+            self.hook = None
+
+class LinearSearch:
+    """Ascend from the floor in fixed steps until the tone is heard"""
+    def __init__(self, floor, ceiling, step=1):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.step = step
+        self.threshold = None
+        self.presentations = 0
+    
+    def start(self):
+        """Return the first level to present"""
+        self.level = self.floor
+        return self.level if self.level < self.ceiling else None
+    
+    def update(self, heard):
+        """Record the response to the last level and return the next level, or None when done"""
+        self.presentations += 1
+        if heard:
+            self.threshold = self.level
+            return None
+        self.level += self.step
+        return self.level if self.level < self.ceiling else None
+
+class StaircaseSearch:
+    """Modified Hughson-Westlake: down 10 dB after a response, up 5 dB after a miss"""
+    def __init__(self, floor, ceiling, step=1, start=-40, step_down=10, step_up=5, max_presentations=30):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.start_level = start
+        self.step_down = step_down
+        self.step_up = step_up
+        self.max_presentations = max_presentations
+        self.threshold = None
+        self.presentations = 0
+    
+    def start(self):
+        """Return the first level to present"""
+        self.level = min(max(self.start_level, self.floor), self.ceiling - 1)
+        self.last_heard = None
+        self.floor_hits = 0
+        
+        # Level -> responses on ascending presentations
+        self.ascending_hits = {}
+        return self.level
+    
+    def update(self, heard):
+        """Record the response to the last level and return the next level, or None when done"""
+        self.presentations += 1
+        level = self.level
+        
+        # Threshold is the first level heard on two ascending runs
+        if heard and self.last_heard is False:
+            self.ascending_hits[level] = self.ascending_hits.get(level, 0) + 1
+            if self.ascending_hits[level] >= 2:
+                self.threshold = level
+                return None
+        
+        # Cannot descend below the floor, so two responses there settle it
+        if heard and level == self.floor:
+            self.floor_hits += 1
+            if self.floor_hits >= 2:
+                self.threshold = level
+                return None
+        
+        # Nothing heard at the loudest level we may present
+        if not heard and level == self.ceiling - 1:
+            return None
+        
+        if self.presentations >= self.max_presentations:
+            return None
+        
+        self.last_heard = heard
+        if heard:
+            self.level = max(level - self.step_down, self.floor)
+        else:
+            self.level = min(level + self.step_up, self.ceiling - 1)
+        return self.level
+
+class BisectionSearch:
+    """Halve the interval between the loudest miss and the quietest response"""
+    def __init__(self, floor, ceiling, step=1):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.step = step
+        self.threshold = None
+        self.presentations = 0
+    
+    def start(self):
+        """Return the first level to present"""
+        # Below the floor counts as missed, the ceiling as not yet heard
+        self.low = self.floor - self.step
+        self.high = self.ceiling
+        return self._midpoint()
+    
+    def _midpoint(self):
+        if self.high - self.low <= self.step:
+            if self.high < self.ceiling:
+                self.threshold = self.high
+            return None
+        self.level = self.low + (self.high - self.low) // (2 * self.step) * self.step
+        return self.level
+    
+    def update(self, heard):
+        """Record the response to the last level and return the next level, or None when done"""
+        self.presentations += 1
+        if heard:
+            self.high = self.level
+        else:
+            self.low = self.level
+        return self._midpoint()
+
+class OfflineRenderer:
+    """Stand-in for AudioEngine that lays presentations out on a virtual timeline"""
+    def __init__(self, sample_rate, target=None, channels=2):
+        self.sample_rate = sample_rate
+        self.target = target  # WAV path or file-like object, None to keep timing only
+        self.channels = channels
+        self.chunks = []
+        self.cursor = 0  # Frames rendered so far
+    
+    def start(self):
+        """Nothing to open, kept for parity with AudioEngine"""
+    
+    def enqueue(self, buffer, delay=0.0):
+        """Append an interleaved buffer to the timeline and return its onset frame"""
+        self.pad(delay)
+        onset = self.cursor
+        frames = buffer.reshape(-1, self.channels)
+        if self.target is not None:
+            self.chunks.append(frames)
+        self.cursor += len(frames)
+        return onset
+    
+    def reserve(self, n_frames):
+        """Advance the timeline by a presentation without synthesizing it"""
+        onset = self.cursor
+        self.cursor += n_frames
+        return onset
+    
+    def pad(self, seconds):
+        """Append silence to the timeline"""
+        n_frames = int(seconds * self.sample_rate)
+        if n_frames <= 0:
+            return
+        if self.target is not None:
+            self.chunks.append(np.zeros((n_frames, self.channels), dtype=np.float32))
+        self.cursor += n_frames
+    
+    def advance_to_ns(self, t_ns):
+        """Pad with silence up to a virtual timestamp"""
+        self.pad((t_ns - self.frame_time_ns(self.cursor)) / 1e9)
+    
+    def frame_time_ns(self, frame):
+        """Virtual timestamp of a frame, counted from the start of the session"""
+        return frame * 1_000_000_000 // self.sample_rate
+    
+    def now_ns(self):
+        """Current virtual time, the end of the timeline"""
+        return self.frame_time_ns(self.cursor)
+    
+    def close(self):
+        """Write the rendered session to the target"""
+        if self.target is not None and self.chunks:
+            from scipy.io import wavfile
+            wavfile.write(self.target, self.sample_rate, np.concatenate(self.chunks))
+        self.chunks = []
+
+class SimulatedListener:
+    """Listener model with a known audiogram and a noisy psychometric response"""
+    def __init__(self, audiogram, spread=2.0, noise='normal', false_alarm_rate=0.0, lapse_rate=0.0,
+                 reaction_mean=0.3, reaction_sd=0.05, seed=None):
+        self.audiogram = audiogram  # {ear: {frequency: true threshold dB or None}}
+        self.spread = spread
+        self.noise = noise
+        self.false_alarm_rate = false_alarm_rate
+        self.lapse_rate = lapse_rate
+        self.reaction_mean = reaction_mean
+        self.reaction_sd = reaction_sd
+        self.rng = random.Random(seed)
+    
+    def detection_probability(self, frequency, ear, volume_db):
+        """Probability of responding to a tone at volume_db"""
+        threshold = self.audiogram[ear].get(frequency)
+        if threshold is None:
+            return self.false_alarm_rate
+        
+        # Psychometric function centred on the true threshold (50% point)
+        z = (volume_db - threshold) / self.spread
+        if self.noise == 'logistic':
+            p = 1 / (1 + math.exp(-z))
+        else:
+            p = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+        return self.false_alarm_rate + (1 - self.false_alarm_rate - self.lapse_rate) * p
+    
+    def respond(self, frequency, ear, volume_db, window):
+        """Return a simulated reaction latency (ns), or None if the tone goes unanswered"""
+        if self.rng.random() >= self.detection_probability(frequency, ear, volume_db):
+            return None
+        reaction = max(self.rng.gauss(self.reaction_mean, self.reaction_sd), 0.1)
+        if reaction > window:
+            return None
+        return int(reaction * 1e9)
+
+class Track:
+    """One (frequency, ear) threshold search in progress"""
+    def __init__(self, frequency, ear, search):
+        self.frequency = frequency
+        self.ear = ear
+        self.search = search
+        self.level = search.start()
+        self.latencies = {}
+        self.ready_ns = 0
+
+class InterleavedScheduler:
+    """Run several threshold tracks at once, presenting whichever is ready with randomized gaps"""
+    def __init__(self, test, strategy, active=3, isi=(0.0, 0.2), response_gap=1.0, seed=None):
+        self.test = test
+        self.strategy = strategy
+        self.active = active
+        self.isi = isi  # Random silence before every onset, so the next tone is never predictable (s)
+        self.response_gap = response_gap  # Rest for a track after it was heard (s)
+        self.rng = random.Random(seed)
+    
+    def run(self, conditions):
+        """Measure every (frequency, ear) condition, interleaving up to `active` tracks"""
+        test = self.test
+        test.reserve_buffers(self.active)
+        pending = list(conditions)
+        self.rng.shuffle(pending)
+        tracks = []
+        
+        while pending or tracks:
+            # Keep the pool of open tracks full
+            while pending and len(tracks) < self.active:
+                frequency, ear = pending.pop()
+                test.prepare(frequency, ear)
+                track = Track(frequency, ear, test.make_search(self.strategy))
+                track.ready_ns = test.now_ns()
+                if track.level is None:
+                    test.record_result(track)
+                else:
+                    tracks.append(track)
+            if not tracks:
+                break
+            
+            # Present a random track whose rest is over, or wait for the first one
+            now_ns = test.now_ns()
+            ready = [track for track in tracks if track.ready_ns <= now_ns]
+            if not ready:
+                track = min(tracks, key=lambda t: t.ready_ns)
+                test.pause((track.ready_ns - now_ns) / 1e9)
+            else:
+                track = self.rng.choice(ready)
+            test.pause(self.rng.uniform(*self.isi))
+            
+            latency_ns = test.present(track.frequency, track.ear, track.level)
+            heard = latency_ns is not None
+            if heard:
+                track.latencies[track.level] = latency_ns
+            
+            track.level = track.search.update(heard)
+            if track.level is None:
+                tracks.remove(track)
+                test.record_result(track)
+            elif heard:
+                track.ready_ns = test.now_ns() + int(self.response_gap * 1e9)
+
+# Threshold search strategies selectable from run_test
+SEARCH_STRATEGIES = {
+    'linear': LinearSearch,
+    'staircase': StaircaseSearch,
+    'bisection': BisectionSearch,
+}
 
 class HearingTest:
-    def __init__(self):
+    def __init__(self, listener=None, render_to=None, verbose=None, trial_log=None, calibration=None):
         self.frequencies = [250, 500, 1000, 2000, 3000, 4000, 6000, 8000]
         self.volume_start = -75
         self.volume_step = 1
+        self.volume_max = -10
         self.sample_rate = 44100
+        self.tone_duration = 0.1
+        self.response_window = 0.6  # Measured from tone onset, long enough for a typical reaction
         
-        # PyAudio setup
-        self.p = pyaudio.PyAudio()
-        self.stream = None
+        # Headless when a simulated listener answers instead of a person
+        self.listener = listener
+        self.verbose = listener is None if verbose is None else verbose
+        self.synthesize = listener is None or render_to is not None
+        self.presentations = 0
         
-        # Results storage
-        self.results = {
-            'left': {},
-            'right': {}
-        }
+        # Tone synthesis, period tables built up front
+        self.tone_bank = ToneBank(self.sample_rate)
+        if self.synthesize:
+            self.tone_bank.prewarm(self.frequencies)
         
-    def generate_sine_wave(self, frequency, duration=1.0, volume_db=-20):
-        """Generate a sine wave of specified frequency, duration and volume"""
-        # Convert dB to amplitude
-        amplitude = 10 ** (volume_db / 20)
+        # Station calibration, applied to every tone
+        self.calibration = load_calibration(calibration)
+        if self.calibration is not None:
+            self.tone_bank.corrections = self.calibration.table(self.frequencies)
+            self.echo(f"Using calibration from '{calibration}'")
+        elif calibration is not None:
+            self.echo(f"No calibration at '{calibration}', levels are uncorrected dBFS")
         
-        # Generate time array
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
+        if listener is None:
+            # PyAudio setup
+            self.p = pyaudio.PyAudio()
+            self.engine = AudioEngine(self.p, self.sample_rate)
+            self.responses = ResponseCapture('space')
+        else:
+            self.p = None
+            self.engine = OfflineRenderer(self.sample_rate, render_to)
+            self.responses = None
         
-        # Generate sine wave
-        sine_wave = amplitude * np.sin(2 * np.pi * frequency * t)
+        # Results storage, thresholds and reaction times per (ear, frequency)
+        self.results = Audiogram(self.frequencies)
         
-        # Convert to 32-bit float
-        audio = sine_wave.astype(np.float32)
+        # Every presentation streamed to an append-only log
+        self.session = time.time_ns()
+        self.session_start_ns = 0
+        self.trial_log = None if trial_log is None else TrialLogWriter(trial_log, self.session)
         
-        return audio
+    def generate_sine_wave(self, frequency, duration=1.0, volume_db=-20):
+        """Generate a sine wave of specified frequency, duration and volume"""
+        return self.tone_bank.tone(frequency, int(self.sample_rate * duration), volume_db)
+    
+    def echo(self, message=""):
+        """Print progress unless running quietly"""
+        if self.verbose:
+            print(message)
+    
+    def pause(self, seconds):
+        """Wait between presentations, or just advance the timeline when headless"""
+        if self.listener is None:
+            time.sleep(seconds)
+        else:
+            self.engine.pad(seconds)
     
     def play_tone(self, frequency, ear, volume_db):
-        """Play a tone at the specified frequency, ear and volume"""
-        # Generate the sine wave
-        tone = self.generate_sine_wave(frequency, duration=0.1, volume_db=volume_db)  # Reduced to 0.1 seconds
+        """Queue a tone at the specified frequency, ear and volume and return its onset time (ns)"""
+        n_samples = int(self.sample_rate * self.tone_duration)
+        if not self.synthesize:
+            # Timing-only headless run, nothing will ever hear the samples
+            return self.engine.frame_time_ns(self.engine.reserve(n_samples))
         
-        # Create stereo sound (left or right channel)
-        stereo = np.zeros((len(tone), 2), dtype=np.float32)
+        # Interleaved stereo buffer, cached by the tone bank
+        stereo_flat = self.tone_bank.stereo(frequency, ear, volume_db, n_samples)
         
-        if ear == 'left':
-            stereo[:, 0] = tone  # Left channel
+        # Hand the tone to the running stream without blocking
+        self.engine.start()
+        onset_frame = self.engine.enqueue(stereo_flat)
+        return self.engine.frame_time_ns(onset_frame)
+    
+    def present(self, frequency, ear, volume_db):
+        """Present one tone and return the reaction latency (ns), or None if not heard"""
+        self.presentations += 1
+        if self.listener is None:
+            # Play tone, listening starts while it is still queued
+            self.responses.clear()
+            onset_ns = self.play_tone(frequency, ear, volume_db)
+            
+            # Wait for a press during the response window
+            deadline_ns = onset_ns + int(self.response_window * 1e9)
+            latency_ns = self.responses.wait_for_response(onset_ns, deadline_ns)
         else:
-            stereo[:, 1] = tone  # Right channel
+            onset_ns = self.play_tone(frequency, ear, volume_db)
+            latency_ns = self.listener.respond(frequency, ear, volume_db, self.response_window)
             
-        # Flatten for PyAudio
-        stereo_flat = stereo.flatten()
-        
-        # Open stream if not already open
-        if self.stream is None or not self.stream.is_active():
-            self.stream = self.p.open(
-                format=pyaudio.paFloat32,
-                channels=2,
-                rate=self.sample_rate,
-                output=True
-            )
-        
-        # Play the tone
-        self.stream.write(stereo_flat.tobytes())
-    
-    def test_frequency(self, frequency, ear):
+            # Move the virtual clock to where the live loop would carry on
+            waited_ns = latency_ns if latency_ns is not None else int(self.response_window * 1e9)
+            self.engine.advance_to_ns(onset_ns + waited_ns)
+        
+        if self.trial_log is not None:
+            self.trial_log.append(ear, frequency, volume_db, onset_ns - self.session_start_ns, latency_ns)
+        return latency_ns
+    
+    def make_search(self, strategy):
+        """Create a threshold search over this test's level range"""
+        return SEARCH_STRATEGIES[strategy](self.volume_start, self.volume_max, self.volume_step)
+    
+    def now_ns(self):
+        """Current time on the presentation clock"""
+        return self.engine.now_ns()
+    
+    def prepare(self, frequency, ear):
+        """Prepare every level a search can reach before the first presentation"""
+        if self.synthesize:
+            self.tone_bank.prewarm([frequency], [ear], range(self.volume_start, self.volume_max, self.volume_step),
+                                   int(self.sample_rate * self.tone_duration))
+    
+    def reserve_buffers(self, tracks):
+        """Size the tone cache so every level of this many prepared conditions fits at once"""
+        levels = len(range(self.volume_start, self.volume_max, self.volume_step))
+        self.tone_bank.max_buffers = max(self.tone_bank.max_buffers, tracks * levels)
+    
+    def record_result(self, track):
+        """Store the threshold a finished track converged on"""
+        frequency, ear, search = track.frequency, track.ear, track.search
+        
+        # Its prepared levels are dead weight now, make room for the next condition
+        self.tone_bank.release(frequency, ear)
+        threshold = search.threshold
+        if threshold is not None:
+            latency_ms = track.latencies[threshold] / 1e6
+            self.results.set(ear, frequency, threshold, latency_ms)
+            self.echo(f"Threshold for {frequency} Hz in {ear} ear: {threshold} dB "
+                      f"(reaction {latency_ms:.0f} ms, {search.presentations} presentations)")
+        else:
+            self.results.set(ear, frequency, None)
+            self.echo(f"Couldn't detect {frequency} Hz in {ear} ear at maximum volume")
+    
+    def test_frequency(self, frequency, ear, strategy='linear'):
         """Test a specific frequency for a specific ear"""
-        print(f"\nTesting {ear} ear at {frequency} Hz")
-        print("Press SPACE when you hear the tone...")
+        self.echo(f"\nTesting {ear} ear at {frequency} Hz")
+        self.echo("Press SPACE when you hear the tone...")
         
-        heard = False
-        current_volume = self.volume_start
+        self.prepare(frequency, ear)
+        track = Track(frequency, ear, self.make_search(strategy))
         
-        while not heard and current_volume < -10:
-            # Play tone
-            self.play_tone(frequency, ear, current_volume)
-            
-            # Check if space was pressed during the tone
-            start_time = time.time()
-            while time.time() - start_time < 0.15:  # Wait just slightly longer than the tone
-                if keyboard.is_pressed('space'):
-                    heard = True
-                    break
-                time.sleep(0.01)
-            
+        while track.level is not None:
+            latency_ns = self.present(frequency, ear, track.level)
+            heard = latency_ns is not None
             if heard:
-                break
-                
-            # Increase volume
-            current_volume += self.volume_step
-            print(f"Volume: {current_volume} dB")
+                track.latencies[track.level] = latency_ns
+            
+            # Let the search pick the next level
+            track.level = track.search.update(heard)
+            if track.level is not None:
+                self.echo(f"Volume: {track.level} dB")
         
         # Store result
-        if heard:
-            self.results[ear][frequency] = current_volume
-            print(f"Threshold for {frequency} Hz in {ear} ear: {current_volume} dB")
-        else:
-            self.results[ear][frequency] = None
-            print(f"Couldn't detect tone at maximum volume")
+        self.record_result(track)
         
         # Small pause between tests
-        time.sleep(1)
+        self.pause(1)
 
-    def run_test(self):
+    def run_test(self, strategy='linear', interleave=1):
         """Run the complete hearing test"""
-        print("DIY Hearing Test")
-        print("================")
-        print("This test will play tones at different frequencies.")
-        print("Press SPACE as soon as you hear each tone.")
-        print("Make sure your headphones are correctly positioned (L/R).")
-        print("\nPress ENTER to start the test...")
+        self.results.strategy = strategy
+        self.echo("DIY Hearing Test")
+        self.echo("================")
+        self.echo("This test will play tones at different frequencies.")
+        self.echo("Press SPACE as soon as you hear each tone.")
+        self.echo("Make sure your headphones are correctly positioned (L/R).")
         
-        keyboard.wait('enter')
-        
-        # Test each ear at each frequency
-        for ear in ['left', 'right']:
-            print(f"\n--- Testing {ear.upper()} ear ---")
-            time.sleep(1)
+        if self.listener is None:
+            print("\nPress ENTER to start the test...")
+            keyboard.wait('enter')
+            self.responses.start()
             
-            for freq in self.frequencies:
-                self.test_frequency(freq, ear)
+            # Stream running before the session clock starts, so the first onset is not timed off a stale clock
+            self.engine.start()
+        self.session_start_ns = self.now_ns()
         
-        # Close the stream
-        if self.stream is not None:
-            self.stream.stop_stream()
-            self.stream.close()
+        if interleave > 1:
+            # Several conditions at once, in random order across both ears
+            scheduler = InterleavedScheduler(self, strategy, active=interleave)
+            scheduler.run([(freq, ear) for ear in ['left', 'right'] for freq in self.frequencies])
+        else:
+            # Test each ear at each frequency
+            for ear in ['left', 'right']:
+                self.echo(f"\n--- Testing {ear.upper()} ear ---")
+                self.pause(1)
+                
+                for freq in self.frequencies:
+                    self.test_frequency(freq, ear, strategy)
         
+        # Close the stream (or write the rendered session) and the trial log
+        self.engine.close()
+        if self.trial_log is not None:
+            self.trial_log.close()
+        if self.listener is not None:
+            return self.results
+        
+        # Release the keyboard hook
+        self.responses.stop()
         self.p.terminate()
         
-        # Show results
+        # Keep the session for batch analysis, then show results
+        self.save_results()
         self.plot_results()
+        return self.results
     
-    def plot_results(self):
-        """Plot the audiogram from the test results"""
-        plt.figure(figsize=(10, 6))
-        
-        # Plot for each ear
-        markers = {'left': 'o', 'right': 'x'}
-        colors = {'left': 'blue', 'right': 'red'}
+    def save_results(self, path=None):
+        """Save the session's thresholds to a timestamped .npz file"""
+        if path is None:
+            path = time.strftime('audiogram_%Y%m%d-%H%M%S.npz')
+        self.results.save(path)
+        print(f"Session saved as '{path}'")
+    
+    def plot_results(self, path='audiogram_results.png'):
+        """Render the audiogram in the background and print the results"""
+        # Snapshot the curves so the worker never touches live state
+        curves = {ear: self.results.detected(ear) for ear in ['left', 'right']}
+        worker = threading.Thread(target=render_audiogram, args=(self.frequencies, curves, path),
+                                  name='audiogram-render')
+        worker.start()
         
-        for ear in ['left', 'right']:
-            # Get the frequencies and thresholds
-            freqs = []
-            thresholds = []
-            
-            for freq in self.frequencies:
-                if freq in self.results[ear] and self.results[ear][freq] is not None:
-                    freqs.append(freq)
-                    thresholds.append(self.results[ear][freq])
-            
-            if freqs:  # Only plot if we have data
-                plt.plot(freqs, thresholds, marker=markers[ear], color=colors[ear], 
-                         label=f'{ear.capitalize()} Ear', linestyle='-')
-        
-        plt.gca().invert_yaxis()
-        plt.xscale('log')
-        plt.xticks(self.frequencies, [str(f) for f in self.frequencies])
-        plt.xlabel('Frequency (Hz)')
-        plt.ylabel('Hearing Level (dB)')
-        plt.title('DIY Audiogram')
-        plt.grid(True)
-        plt.legend()
-        plt.savefig('audiogram_results.png')
-        
-        print("\nTest complete! Results saved as 'audiogram_results.png'")
+        print(f"\nTest complete! Audiogram is being saved as '{path}'")
         print("\nYour results (dB):")
         for ear in ['left', 'right']:
             print(f"\n{ear.upper()} EAR:")
             for freq in self.frequencies:
-                if freq in self.results[ear] and self.results[ear][freq] is not None:
-                    print(f"  {freq} Hz: {self.results[ear][freq]} dB")
+                threshold = self.results.get(ear, freq)
+                if threshold is not None:
+                    print(f"  {freq} Hz: {threshold:g} dB")
                 else:
                     print(f"  {freq} Hz: Not detected")
+        return worker
+
+def render_audiogram(frequencies, curves, path):
+    """Plot the audiogram to a PNG file, runs on a worker thread"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    
+    # Figure API rather than pyplot, which keeps global state and is not thread safe
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    
+    # Plot for each ear
+    markers = {'left': 'o', 'right': 'x'}
+    colors = {'left': 'blue', 'right': 'red'}
+    
+    for ear in ['left', 'right']:
+        freqs, thresholds = curves[ear]
+        if len(freqs):  # Only plot if we have data
+            ax.plot(freqs, thresholds, marker=markers[ear], color=colors[ear],
+                    label=f'{ear.capitalize()} Ear', linestyle='-')
+    
+    ax.invert_yaxis()
+    ax.set_xscale('log')
+    ax.set_xticks(frequencies, [str(f) for f in frequencies])
+    ax.set_xlabel('Frequency (Hz)')
+    ax.set_ylabel('Hearing Level (dB)')
+    ax.set_title('DIY Audiogram')
+    ax.grid(True)
+    ax.legend()
+    fig.savefig(path)
+    
+    print(f"\nAudiogram saved as '{path}'")
+
+def simulate_sessions(audiogram, strategy='linear', runs=1000, seed=0, interleave=1, **listener_options):
+    """Run headless sessions against a simulated listener and summarize threshold accuracy"""
+    rng = random.Random(seed)
+    measured = []
+    presentations = 0
+    session_seconds = 0.0
+    
+    start = time.perf_counter()
+    for _ in range(runs):
+        listener = SimulatedListener(audiogram, seed=rng.random(), **listener_options)
+        test = HearingTest(listener=listener)
+        measured.append(test.run_test(strategy, interleave).thresholds)
+        presentations += test.presentations
+        session_seconds += test.now_ns() / 1e9
+    elapsed = time.perf_counter() - start
+    
+    # Compare every session against the true audiogram in one go
+    true = Audiogram(test.frequencies)
+    for ear in ['left', 'right']:
+        for freq in test.frequencies:
+            true.set(ear, freq, audiogram[ear].get(freq))
+    measured = np.ma.stack(measured)
+    missed = int((np.ma.getmaskarray(measured) != np.ma.getmaskarray(true.thresholds)).sum())
+    errors = (measured - true.thresholds).compressed()
+    
+    return {
+        'strategy': strategy,
+        'sessions_per_second': runs / elapsed,
+        'presentations_per_session': presentations / runs,
+        'session_minutes': session_seconds / runs / 60,
+        'mean_error': float(errors.mean()) if len(errors) else float('nan'),
+        'mean_abs_error': float(np.abs(errors).mean()) if len(errors) else float('nan'),
+        'missed': missed,
+    }
 
 if __name__ == "__main__":
-    # Create and run the test
-    test = HearingTest()
-    test.run_test()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="DIY hearing test")
+    parser.add_argument("--strategy", choices=sorted(SEARCH_STRATEGIES), default="linear",
+                        help="threshold search strategy")
+    parser.add_argument("--interleave", type=int, default=1, metavar="TRACKS",
+                        help="number of conditions to interleave (1 tests them one after another)")
+    parser.add_argument("--simulate", type=int, metavar="RUNS",
+                        help="run headless sessions against a simulated listener instead")
+    parser.add_argument("--true-threshold", type=float, default=-50,
+                        help="simulated listener threshold at every frequency (dB)")
+    parser.add_argument("--trial-log", default="hearing_trials.bin", metavar="PATH",
+                        help="append every presentation of a live session to this log")
+    parser.add_argument("--calibration", default="calibration.npz", metavar="PATH",
+                        help="correction table written by calibration.py")
+    parser.add_argument("--render", metavar="WAV",
+                        help="write one simulated session to a WAV file")
+    args = parser.parse_args()
+    
+    if args.simulate or args.render:
+        frequencies = HearingTest(listener=SimulatedListener({})).frequencies
+        audiogram = {ear: {freq: args.true_threshold for freq in frequencies} for ear in ['left', 'right']}
+        if args.render:
+            test = HearingTest(listener=SimulatedListener(audiogram), render_to=args.render, verbose=True)
+            test.run_test(args.strategy, args.interleave)
+        if args.simulate:
+            print(simulate_sessions(audiogram, args.strategy, args.simulate, interleave=args.interleave))
+    else:
+        # Create and run the test
+        test = HearingTest(trial_log=args.trial_log, calibration=args.calibration)
+        test.run_test(args.strategy, args.interleave)
@@ -0,0 +1,236 @@
+import argparse
+import collections
+import threading
+import time
+import numpy as np
+import pyaudio
+from audio import AudioEngine, ToneBank
+
+PERCENTILES = (50, 90, 99)
+
+def time_stage(fn, repeats):
+    """Call fn repeatedly and return the per-call durations in microseconds"""
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+    return samples / 1e3
+
+def report(name, samples, unit="us"):
+    """Print percentiles and the worst case of a set of measurements"""
+    p = np.percentile(samples, PERCENTILES)
+    columns = "  ".join(f"p{q} {v:9.1f}" for q, v in zip(PERCENTILES, p))
+    print(f"  {name:<34} {columns}  max {samples.max():9.1f} {unit}")
+
+def reference_sine_wave(frequency, duration, volume_db, sample_rate):
+    """The original per-call synthesis, kept as a baseline"""
+    amplitude = 10 ** (volume_db / 20)
+    t = np.linspace(0, duration, int(sample_rate * duration), False)
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def reference_stereo(tone, ear):
+    """The original per-call stereo build"""
+    stereo = np.zeros((len(tone), 2), dtype=np.float32)
+    stereo[:, 0 if ear == 'left' else 1] = tone
+    return stereo.flatten()
+
+def bench_synthesis(sample_rates, repeats, frequency=1000, duration=0.1, volume_db=-40):
+    """Time each stage of tone preparation"""
+    for rate in sample_rates:
+        n_samples = int(rate * duration)
+        print(f"\nSynthesis at {rate} Hz ({n_samples} samples)")
+        
+        tone = reference_sine_wave(frequency, duration, volume_db, rate)
+        report("reference generate_sine_wave", time_stage(
+            lambda: reference_sine_wave(frequency, duration, volume_db, rate), repeats))
+        report("reference stereo build", time_stage(lambda: reference_stereo(tone, 'left'), repeats))
+        
+        report("tone bank, cold table", time_stage(
+            lambda: ToneBank(rate).tone(frequency, n_samples, volume_db), repeats))
+        bank = ToneBank(rate)
+        report("tone bank, tone", time_stage(lambda: bank.tone(frequency, n_samples, volume_db), repeats))
+        report("tone bank, stereo uncached", time_stage(
+            lambda: bank.buffers.clear() or bank.stereo(frequency, 'left', volume_db, n_samples), repeats))
+        report("tone bank, stereo cached", time_stage(
+            lambda: bank.stereo(frequency, 'left', volume_db, n_samples), repeats))
+
+def bench_write(p, sample_rates, buffer_sizes, repeats, device=None, duration=0.1):
+    """Time blocking stream.write of one presentation per buffer size"""
+    for rate in sample_rates:
+        buffer = ToneBank(rate).stereo(1000, 'left', -40, int(rate * duration)).tobytes()
+        print(f"\nBlocking write of {duration * 1000:.0f} ms at {rate} Hz")
+        for frames in buffer_sizes:
+            stream = p.open(format=pyaudio.paFloat32, channels=2, rate=rate, output=True,
+                            frames_per_buffer=frames, output_device_index=device)
+            try:
+                report(f"write, {frames}-frame buffer", time_stage(lambda: stream.write(buffer), repeats) / 1e3, "ms")
+            finally:
+                stream.stop_stream()
+                stream.close()
+
+class LoopbackProbe:
+    """Input callback that timestamps the first sample above a level once armed"""
+    def __init__(self, sample_rate, channels=2, level=0.05):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.level = level
+        self.detected = threading.Event()
+        self.detect_ns = None
+        self.armed = False
+    
+    def arm(self):
+        self.detect_ns = None
+        self.detected.clear()
+        self.armed = True
+    
+    def callback(self, in_data, frame_count, time_info, status):
+        now_ns = time.perf_counter_ns()
+        if self.armed:
+            hits = np.flatnonzero(np.abs(np.frombuffer(in_data, dtype=np.float32)) > self.level)
+            if len(hits):
+                # Age of the first sample in this block, when the host API reports it
+                age = time_info['current_time'] - time_info['input_buffer_adc_time']
+                if not 0 <= age < 1:
+                    age = 0
+                offset_ns = (hits[0] // self.channels) * 1_000_000_000 // self.sample_rate
+                self.detect_ns = now_ns - int(age * 1e9) + offset_ns
+                self.armed = False
+                self.detected.set()
+        return None, pyaudio.paContinue
+
+def bench_loopback(p, sample_rates, buffer_sizes, trials, output_device=None, input_device=None):
+    """Measure enqueue-to-input latency and onset estimate error through a loopback path"""
+    for rate in sample_rates:
+        # Short full-scale burst on both channels, easy to detect on the way back
+        burst = ToneBank(rate).tone(1000, int(rate * 0.01), -6)
+        click = np.repeat(burst, 2)
+        
+        print(f"\nLoopback at {rate} Hz ({trials} trials)")
+        for frames in buffer_sizes:
+            engine = AudioEngine(p, rate, frames_per_buffer=frames, device=output_device)
+            probe = LoopbackProbe(rate)
+            engine.start()
+            recorder = p.open(format=pyaudio.paFloat32, channels=2, rate=rate, input=True,
+                              frames_per_buffer=frames, input_device_index=input_device,
+                              stream_callback=probe.callback)
+            
+            round_trip = []
+            onset_error = []
+            missed = 0
+            try:
+                for _ in range(trials):
+                    probe.arm()
+                    called_ns = time.perf_counter_ns()
+                    expected_ns = engine.frame_time_ns(engine.enqueue(click))
+                    if probe.detected.wait(1.0):
+                        round_trip.append((probe.detect_ns - called_ns) / 1e6)
+                        onset_error.append((probe.detect_ns - expected_ns) / 1e6)
+                    else:
+                        missed += 1
+                    # Decorrelate the next trial from the callback phase
+                    time.sleep(0.05 + np.random.uniform(0, frames / rate))
+            finally:
+                recorder.stop_stream()
+                recorder.close()
+                engine.close()
+            
+            if round_trip:
+                report(f"enqueue to input, {frames}-frame", np.array(round_trip), "ms")
+                report(f"onset estimate error, {frames}-frame", np.array(onset_error), "ms")
+            if missed:
+                print(f"  {missed} bursts never came back")
+
+class NullAudio:
+    """PyAudio stand-in that consumes output in real time and loops it back to inputs after a delay"""
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.loopback = collections.deque()
+    
+    def open(self, rate, channels, format=None, input=False, output=False, frames_per_buffer=1024,
+             stream_callback=None, **kwargs):
+        if input:
+            self.loopback.clear()  # Nothing from earlier streams should come back
+        return NullStream(self, rate, channels, input, frames_per_buffer, stream_callback)
+    
+    def terminate(self):
+        pass
+
+class NullStream:
+    """One simulated stream of NullAudio, callback or blocking"""
+    def __init__(self, device, rate, channels, is_input, frames_per_buffer, callback):
+        self.device = device
+        self.rate = rate
+        self.channels = channels
+        self.is_input = is_input
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = callback
+        self.running = callback is not None
+        self.thread = None
+        if self.running:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def _run(self):
+        """Tick at the device block rate and drive the callback"""
+        period_ns = self.frames_per_buffer * 1_000_000_000 // self.rate
+        latency_ns = int(self.device.latency * 1e9)
+        silence = bytes(self.frames_per_buffer * self.channels * 4)
+        next_ns = time.perf_counter_ns()
+        while self.running:
+            now_ns = time.perf_counter_ns()
+            if self.is_input:
+                data, due_ns = silence, now_ns
+                if self.device.loopback and self.device.loopback[0][0] <= now_ns:
+                    due_ns, data = self.device.loopback.popleft()
+                time_info = {'current_time': now_ns / 1e9, 'input_buffer_adc_time': due_ns / 1e9}
+                self.callback(data, self.frames_per_buffer, time_info, 0)
+            else:
+                time_info = {'current_time': now_ns / 1e9, 'output_buffer_dac_time': (now_ns + latency_ns) / 1e9}
+                data, _ = self.callback(None, self.frames_per_buffer, time_info, 0)
+                self.device.loopback.append((now_ns + latency_ns, data))
+            next_ns += period_ns
+            time.sleep(max(next_ns - time.perf_counter_ns(), 0) / 1e9)
+    
+    def write(self, data):
+        """Blocking write, returns once the device would have consumed the data"""
+        time.sleep(len(data) / (4 * self.channels * self.rate))
+    
+    def get_output_latency(self):
+        return self.device.latency
+    
+    def is_active(self):
+        return self.running
+    
+    def stop_stream(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+    
+    def close(self):
+        self.stop_stream()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the hearing test audio path")
+    parser.add_argument("--rates", type=int, nargs="+", default=[44100, 48000])
+    parser.add_argument("--buffers", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--repeats", type=int, default=200, help="repetitions per synthesis stage")
+    parser.add_argument("--writes", type=int, default=20, help="blocking writes per buffer size")
+    parser.add_argument("--trials", type=int, default=50, help="loopback bursts per buffer size")
+    parser.add_argument("--null", action="store_true", help="use a simulated null-sink device instead of PyAudio")
+    parser.add_argument("--latency", type=float, default=0.02, help="null-sink loopback latency (s)")
+    parser.add_argument("--output-device", type=int, help="PyAudio output device index")
+    parser.add_argument("--input-device", type=int, help="PyAudio input device index for the loopback")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["synthesis", "write", "loopback"])
+    args = parser.parse_args()
+    
+    p = NullAudio(args.latency) if args.null else pyaudio.PyAudio()
+    try:
+        if "synthesis" not in args.skip:
+            bench_synthesis(args.rates, args.repeats)
+        if "write" not in args.skip:
+            bench_write(p, args.rates, args.buffers, args.writes, args.output_device)
+        if "loopback" not in args.skip:
+            bench_loopback(p, args.rates, args.buffers, args.trials, args.output_device, args.input_device)
+    finally:
+        p.terminate()
@@ -0,0 +1,138 @@
+import glob
+import warnings
+import numpy as np
+
+EARS = ('left', 'right')
+
+# Frequencies of the standard pure-tone average
+PTA_FREQUENCIES = (500, 1000, 2000, 4000)
+
+class Audiogram:
+    """Thresholds of one session as masked (ear, frequency) arrays"""
+    def __init__(self, frequencies, thresholds=None, reaction_times=None, strategy=''):
+        self.frequencies = np.asarray(frequencies, dtype=np.int32)
+        shape = (len(EARS), len(self.frequencies))
+        
+        # Masked entries have no threshold (not tested or never heard)
+        self.thresholds = np.ma.masked_all(shape, dtype=np.float32) if thresholds is None else thresholds
+        self.reaction_times = np.ma.masked_all(shape, dtype=np.float32) if reaction_times is None else reaction_times
+        self.strategy = strategy
+        
+        self.columns = {int(freq): i for i, freq in enumerate(self.frequencies)}
+    
+    def set(self, ear, frequency, threshold, reaction_time=None):
+        """Store the threshold (dB) and reaction time (ms) for one condition, None when not detected"""
+        index = (EARS.index(ear), self.columns[frequency])
+        self.thresholds[index] = np.ma.masked if threshold is None else threshold
+        self.reaction_times[index] = np.ma.masked if reaction_time is None else reaction_time
+    
+    def get(self, ear, frequency):
+        """Return the threshold (dB) for one condition, or None"""
+        value = self.thresholds[EARS.index(ear), self.columns[frequency]]
+        return None if value is np.ma.masked else float(value)
+    
+    def detected(self, ear):
+        """Return the frequencies and thresholds that were detected in one ear"""
+        row = self.thresholds[EARS.index(ear)]
+        keep = ~np.ma.getmaskarray(row)
+        return self.frequencies[keep], row.data[keep]
+    
+    def save(self, path):
+        """Save the session to an .npz file, missing values stored as NaN"""
+        np.savez(path,
+                 frequencies=self.frequencies,
+                 thresholds=self.thresholds.filled(np.nan),
+                 reaction_times=self.reaction_times.filled(np.nan),
+                 strategy=np.array(self.strategy))
+    
+    @classmethod
+    def load(cls, path):
+        """Load a session saved with save()"""
+        with np.load(path) as data:
+            return cls(data['frequencies'],
+                       np.ma.masked_invalid(data['thresholds']),
+                       np.ma.masked_invalid(data['reaction_times']),
+                       str(data['strategy']))
+
+class AudiogramBatch:
+    """Many sessions stacked into masked (session, ear, frequency) arrays"""
+    def __init__(self, frequencies, thresholds, reaction_times, paths=()):
+        self.frequencies = np.asarray(frequencies, dtype=np.int32)
+        self.thresholds = thresholds
+        self.reaction_times = reaction_times
+        self.paths = list(paths)
+    
+    @classmethod
+    def load(cls, paths):
+        """Load saved sessions, given as a list of paths or a glob pattern"""
+        if isinstance(paths, str):
+            paths = sorted(glob.glob(paths))
+        if not paths:
+            raise ValueError("No sessions to load")
+        
+        frequencies = None
+        thresholds = []
+        reaction_times = []
+        for path in paths:
+            with np.load(path) as data:
+                if frequencies is None:
+                    frequencies = data['frequencies']
+                elif not np.array_equal(frequencies, data['frequencies']):
+                    raise ValueError(f"{path} was tested at different frequencies")
+                thresholds.append(data['thresholds'])
+                reaction_times.append(data['reaction_times'])
+        
+        return cls(frequencies,
+                   np.ma.masked_invalid(np.stack(thresholds)),
+                   np.ma.masked_invalid(np.stack(reaction_times)),
+                   paths)
+    
+    def __len__(self):
+        return len(self.thresholds)
+    
+    def columns(self, frequencies):
+        """Column indices of the given frequencies"""
+        lookup = {int(freq): i for i, freq in enumerate(self.frequencies)}
+        return [lookup[freq] for freq in frequencies]
+    
+    def pure_tone_average(self, frequencies=PTA_FREQUENCIES):
+        """Mean threshold over the given frequencies, per (session, ear), masked if any is missing"""
+        selected = self.thresholds[..., self.columns(frequencies)]
+        average = selected.data.mean(axis=-1)
+        return np.ma.masked_array(average, mask=np.ma.getmaskarray(selected).any(axis=-1))
+    
+    def asymmetry(self, frequencies=None):
+        """Right minus left threshold per (session, frequency), or of the PTA if frequencies are given"""
+        if frequencies is not None:
+            average = self.pure_tone_average(frequencies)
+            return average[:, 1] - average[:, 0]
+        return self.thresholds[:, 1] - self.thresholds[:, 0]
+    
+    def percentiles(self, q=(10, 25, 50, 75, 90)):
+        """Threshold percentiles across sessions, shaped (len(q), ear, frequency)"""
+        # Conditions nobody heard come out as NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanpercentile(self.thresholds.filled(np.nan), q, axis=0)
+    
+    def summary(self):
+        """Print per-frequency percentiles and the average PTA and asymmetry"""
+        q = (10, 50, 90)
+        table = self.percentiles(q)
+        print(f"{len(self)} sessions")
+        for e, ear in enumerate(EARS):
+            print(f"\n{ear.upper()} EAR (p10 / p50 / p90 dB):")
+            for f, freq in enumerate(self.frequencies):
+                print(f"  {freq} Hz: " + " / ".join(f"{table[i, e, f]:.1f}" for i in range(len(q))))
+        
+        pta = self.pure_tone_average()
+        print(f"\nPure-tone average: left {pta[:, 0].mean():.1f} dB, right {pta[:, 1].mean():.1f} dB")
+        print(f"Mean asymmetry (right - left PTA): {self.asymmetry(PTA_FREQUENCIES).mean():.1f} dB")
+
+if __name__ == "__main__":
+    import sys
+    
+    # Summarize every session matching the given paths or patterns
+    patterns = sys.argv[1:] or ["audiogram_*.npz"]
+    batch = AudiogramBatch.load(sorted(path for pattern in patterns for path in glob.glob(pattern)))
+    batch.summary()
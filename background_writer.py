@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+
+DUE = object()  # Nothing arrived before the oldest held-back item was due
+
+class BackgroundWriter:
+    """Daemon thread that writes queued items in batches, each one at most `interval` s after it was put"""
+    def __init__(self, write, name, batch=64, interval=1.0, finish=None):
+        self.write = write        # Called on the thread with a list of items, must leave them flushed or committed
+        self.finish = finish      # Called on the thread after the last batch
+        self.batch = batch
+        self.interval = interval
+        self.written = 0          # Items written so far
+        self.closed = False
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+    
+    def put(self, item):
+        """Queue one item, returns without waiting on the disk"""
+        self.queue.put(item)
+    
+    def flush(self):
+        """Wait until every item put so far has been written"""
+        done = threading.Event()
+        self.queue.put(done)
+        while not done.wait(0.1):
+            if not self.thread.is_alive():
+                return
+    
+    def close(self):
+        """Write everything still queued, run finish and stop the thread; later calls do nothing"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+    
+    def _run(self):
+        items = []
+        deadline = None
+        while True:
+            # Wait for more only until the oldest item held back is due
+            try:
+                item = self.queue.get(timeout=None if not items else max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = DUE
+            if item is not None and item is not DUE and not isinstance(item, threading.Event):
+                if not items:
+                    deadline = time.monotonic() + self.interval
+                items.append(item)
+                if len(items) < self.batch:
+                    continue
+            
+            # Batch full, oldest item due, flush or close: write what is held back
+            if items:
+                self.write(items)
+                self.written += len(items)
+                items = []
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                break
+        if self.finish is not None:
+            self.finish()
@@ -1,45 +1,32 @@
 import tkinter as tk
 from tkinter import ttk
-import random
+import argparse
+from math_engine import MathEngine, OPERATION_SYMBOLS, solution_text
+from progress_store import ProgressStore
+from tkprofile import TkProfiler
 
 class MentalMathTrainer:
-    def __init__(self, root):
+    def __init__(self, root, store=None):
         self.root = root
         self.root.title("Mental Math Trainer")
-        self.root.geometry("550x450")
+        self.root.geometry("550x490")
         self.root.resizable(False, False)
         
-        self.correct_count = 0
-        self.wrong_count = 0
-        self.current_problem = {"num1": 0, "num2": 0, "operation": "", "answer": 0}
-        
-        self.division_stats = {
-            2: {"correct": 0, "total": 0},
-            3: {"correct": 0, "total": 0},
-            4: {"correct": 0, "total": 0},
-            5: {"correct": 0, "total": 0},
-            6: {"correct": 0, "total": 0},
-            7: {"correct": 0, "total": 0},
-            8: {"correct": 0, "total": 0},
-            9: {"correct": 0, "total": 0}
-        }
-        
-        self.multiplication_stats = {
-            2: {"correct": 0, "total": 0},
-            3: {"correct": 0, "total": 0},
-            4: {"correct": 0, "total": 0},
-            5: {"correct": 0, "total": 0},
-            6: {"correct": 0, "total": 0},
-            7: {"correct": 0, "total": 0},
-            8: {"correct": 0, "total": 0},
-            9: {"correct": 0, "total": 0}
-        }
+        # Problems, answers and statistics live in the engine, the display is refreshed from it
+        self.engine = MathEngine(store)
+        self.stats = self.engine.stats
+        self.stats_refresh = None
+        if store is not None:
+            self.root.protocol("WM_DELETE_WINDOW", self.close)
         
         self.show_solution = tk.BooleanVar(value=False)
+        self.spaced_repetition = tk.BooleanVar(value=True)
         self.exercise_type = tk.StringVar(value="division")
         
         # Create widgets
         self.create_widgets()
+        self.update_solution_visibility()
+        self.update_stats()
         
         self.generate_problem()
 
@@ -60,6 +47,9 @@ class MentalMathTrainer:
         multiplication_radio = ttk.Radiobutton(exercise_frame, text="Multiplication", variable=self.exercise_type, value="multiplication", command=self.generate_problem)
         multiplication_radio.pack(side=tk.LEFT, padx=5)
         
+        review_check = ttk.Checkbutton(exercise_frame, text="Spaced repetition", variable=self.spaced_repetition)
+        review_check.pack(side=tk.LEFT, padx=(15, 0))
+        
         # Problem display
         self.problem_var = tk.StringVar()
         problem_label = ttk.Label(main_frame, textvariable=self.problem_var, font=("Arial", 30))
@@ -122,15 +112,17 @@ class MentalMathTrainer:
         div_row1_frame = ttk.Frame(division_tab)
         div_row1_frame.pack(anchor=tk.W)
         for i in range(2, 6):
-            self.division_vars[i] = tk.StringVar(value=f"÷{i}: 0%")
-            ttk.Label(div_row1_frame, textvariable=self.division_vars[i], font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+            self.division_vars[i] = tk.StringVar(value=self.stat_text("division", i))
+            ttk.Label(div_row1_frame, textvariable=self.division_vars[i], font=("Arial", 10), width=10, anchor=tk.CENTER,
+                      justify=tk.CENTER).pack(side=tk.LEFT, padx=5)
         
         # Second row: divisors 6-9
         div_row2_frame = ttk.Frame(division_tab)
         div_row2_frame.pack(anchor=tk.W)
         for i in range(6, 10):
-            self.division_vars[i] = tk.StringVar(value=f"÷{i}: 0%")
-            ttk.Label(div_row2_frame, textvariable=self.division_vars[i], font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+            self.division_vars[i] = tk.StringVar(value=self.stat_text("division", i))
+            ttk.Label(div_row2_frame, textvariable=self.division_vars[i], font=("Arial", 10), width=10, anchor=tk.CENTER,
+                      justify=tk.CENTER).pack(side=tk.LEFT, padx=5)
         
         # Multiplication achievements tab
         multiplication_tab = ttk.Frame(self.achievement_notebook)
@@ -142,15 +134,19 @@ class MentalMathTrainer:
         mul_row1_frame = ttk.Frame(multiplication_tab)
         mul_row1_frame.pack(anchor=tk.W)
         for i in range(2, 6):
-            self.multiplication_vars[i] = tk.StringVar(value=f"×{i}: 0%")
-            ttk.Label(mul_row1_frame, textvariable=self.multiplication_vars[i], font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+            self.multiplication_vars[i] = tk.StringVar(value=self.stat_text("multiplication", i))
+            ttk.Label(mul_row1_frame, textvariable=self.multiplication_vars[i], font=("Arial", 10), width=10, anchor=tk.CENTER,
+                      justify=tk.CENTER).pack(side=tk.LEFT, padx=5)
         
         # Second row: multipliers 6-9
         mul_row2_frame = ttk.Frame(multiplication_tab)
         mul_row2_frame.pack(anchor=tk.W)
         for i in range(6, 10):
-            self.multiplication_vars[i] = tk.StringVar(value=f"×{i}: 0%")
-            ttk.Label(mul_row2_frame, textvariable=self.multiplication_vars[i], font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+            self.multiplication_vars[i] = tk.StringVar(value=self.stat_text("multiplication", i))
+            ttk.Label(mul_row2_frame, textvariable=self.multiplication_vars[i], font=("Arial", 10), width=10, anchor=tk.CENTER,
+                      justify=tk.CENTER).pack(side=tk.LEFT, padx=5)
+        
+        self.stat_vars = {"division": self.division_vars, "multiplication": self.multiplication_vars}
         
         # Next button
         next_btn = ttk.Button(main_frame, text="Next Problem", command=self.generate_problem)
@@ -165,161 +161,41 @@ class MentalMathTrainer:
         # Get current exercise type
         exercise_type = self.exercise_type.get()
         
+        self.engine.spaced_repetition = self.spaced_repetition.get()
         if exercise_type == "division":
             self.generate_division_problem()
         else:  # multiplication
             self.generate_multiplication_problem()
             
-        # Update solution method
-        self.update_solution_method()
-        
-        # Update solution visibility
-        self.update_solution_visibility()
+        # Solution method is only worked out while the panel is visible
+        if self.show_solution.get():
+            self.update_solution_method()
     
     def generate_division_problem(self):
         """Generate a division problem with natural number result."""
-        # Choose divisor (2-9)
-        divisor = random.randint(2, 9)
-        
-        # Generate answer first (max 200 to avoid numbers > 1000)
-        answer = random.randint(1, 200)
-        
-        # Calculate dividend
-        dividend = answer * divisor
-        
-        # Set current problem
-        self.current_problem = {
-            "num1": dividend,
-            "num2": divisor,
-            "operation": "division",
-            "answer": answer
-        }
+        # Due reviews first, otherwise weak facts come up more often
+        problem = self.engine.next_problem("division")
         
         # Update problem display
-        self.problem_var.set(f"{dividend} ÷ {divisor} = ?")
+        self.problem_var.set(f"{problem['num1']} ÷ {problem['num2']} = ?")
     
     def generate_multiplication_problem(self):
         """Generate a multiplication problem with two factors."""
-        # First factor (2-9)
-        factor1 = random.randint(2, 9)
-        
-        # Second factor (2-19)
-        factor2 = random.randint(2, 9)
-        
-        # Calculate answer
-        answer = factor1 * factor2
-        
-        # Set current problem
-        self.current_problem = {
-            "num1": factor1,
-            "num2": factor2,
-            "operation": "multiplication",
-            "answer": answer
-        }
+        # Due reviews first, otherwise weak facts come up more often
+        problem = self.engine.next_problem("multiplication")
         
         # Update problem display
-        self.problem_var.set(f"{factor1} × {factor2} = ?")
+        self.problem_var.set(f"{problem['num1']} × {problem['num2']} = ?")
 
     def update_solution_method(self):
-        """Generate solution method based on the problem type."""
-        operation = self.current_problem["operation"]
-        
-        if operation == "division":
-            self.update_division_solution()
-        else:  # multiplication
-            self.update_multiplication_solution()
+        """Show the solution method for the current problem."""
+        problem = self.engine.current_problem
+        self.solution_var.set(solution_text(problem["operation"], problem["num1"], problem["num2"], problem["answer"]))
     
-    def update_division_solution(self):
-        """Generate solution method for division using approximation approach."""
-        dividend = self.current_problem["num1"]
-        divisor = self.current_problem["num2"]
-        
-        # Find nearest easy multiple
-        base_multiple = (dividend // divisor) * divisor
-        if abs((base_multiple + divisor) - dividend) < abs(base_multiple - dividend):
-            base_multiple += divisor
-        
-        if base_multiple == dividend:
-            # No approximation needed
-            self.solution_var.set(f"{dividend} ÷ {divisor} = {dividend // divisor}")
-            return
-            
-        # Calculate solution method
-        diff = base_multiple - dividend
-        solution = ""
-        
-        if diff > 0:  # We approximated up
-            solution = f"{dividend} ÷ {divisor}:\n"
-            solution += f"- Approximate to {base_multiple} (nearest easy multiple of {divisor})\n"
-            solution += f"- {base_multiple} ÷ {divisor} = {base_multiple // divisor}\n"
-            solution += f"- Difference: {base_multiple} - {dividend} = {diff}\n"
-            solution += f"- {diff} ÷ {divisor} = {diff // divisor}\n"
-            solution += f"- Result: {base_multiple // divisor} - {diff // divisor} = {self.current_problem['answer']}"
-        else:  # We approximated down
-            diff = abs(diff)
-            solution = f"{dividend} ÷ {divisor}:\n"
-            solution += f"- Approximate to {base_multiple} (nearest easy multiple of {divisor})\n"
-            solution += f"- {base_multiple} ÷ {divisor} = {base_multiple // divisor}\n"
-            solution += f"- Difference: {dividend} - {base_multiple} = {diff}\n"
-            solution += f"- {diff} ÷ {divisor} = {diff // divisor}\n"
-            solution += f"- Result: {base_multiple // divisor} + {diff // divisor} = {self.current_problem['answer']}"
-        
-        self.solution_var.set(solution)
-    
-    def update_multiplication_solution(self):
-        """Generate solution method for multiplication using mental math strategies."""
-        factor1 = self.current_problem["num1"]
-        factor2 = self.current_problem["num2"]
-        answer = self.current_problem["answer"]
-        
-        # Different strategies based on the factors
-        solution = f"{factor1} × {factor2}:\n"
-        
-        # Strategy 1: Break down into tens and ones
-        if factor2 > 10:
-            tens = (factor2 // 10) * 10
-            ones = factor2 % 10
-            solution += f"Strategy 1: Break down into tens and ones\n"
-            solution += f"- {factor1} × {tens} = {factor1 * tens}\n"
-            solution += f"- {factor1} × {ones} = {factor1 * ones}\n"
-            solution += f"- Add: {factor1 * tens} + {factor1 * ones} = {answer}\n\n"
-        
-        # Strategy 2: Round and adjust
-        round_factor = 0
-        if factor2 < 10:
-            if factor2 < 5:
-                round_factor = 5
-            else:
-                round_factor = 10
-        else:
-            if factor2 < 15:
-                round_factor = 15
-            else:
-                round_factor = 20
-        
-        diff = round_factor - factor2
-        round_result = factor1 * round_factor
-        adjustment = factor1 * diff
-        
-        solution += f"Strategy 2: Round and adjust\n"
-        if diff > 0:  # We rounded up
-            solution += f"- Round {factor2} up to {round_factor}\n"
-            solution += f"- {factor1} × {round_factor} = {round_result}\n"
-            solution += f"- Adjustment: {factor1} × {diff} = {adjustment}\n"
-            solution += f"- Subtract: {round_result} - {adjustment} = {answer}"
-        else:  # We rounded down
-            diff = abs(diff)
-            adjustment = factor1 * diff
-            solution += f"- Round {factor2} down to {round_factor}\n"
-            solution += f"- {factor1} × {round_factor} = {round_result}\n"
-            solution += f"- Adjustment: {factor1} × {diff} = {adjustment}\n"
-            solution += f"- Add: {round_result} + {adjustment} = {answer}"
-        
-        self.solution_var.set(solution)
-
     def update_solution_visibility(self):
         """Update solution visibility based on checkbox."""
         if self.show_solution.get():
+            self.update_solution_method()
             self.solution_frame.pack(fill=tk.X, pady=10)
         else:
             self.solution_frame.pack_forget()
@@ -328,87 +204,91 @@ class MentalMathTrainer:
         """Check if the user's answer is correct."""
         try:
             user_answer = int(self.answer_var.get())
-            correct_answer = self.current_problem["answer"]
-            operation = self.current_problem["operation"]
+            correct_answer = self.engine.current_problem["answer"]
+            operation = self.engine.current_problem["operation"]
+            
+            tab = 0 if operation == "division" else 1
+            
+            # Only switch when the user is looking at the other tab
+            if tab != self.achievement_notebook.index("current"):
+                self.achievement_notebook.select(tab)
             
-            if operation == "division":
-                factor = self.current_problem["num2"]  # divisor
-                stats_dict = self.division_stats
-                vars_dict = self.division_vars
-                self.achievement_notebook.select(0)  # Select division tab
-            else:  # multiplication
-                factor = self.current_problem["num1"]  # first factor (2-9)
-                stats_dict = self.multiplication_stats
-                vars_dict = self.multiplication_vars
-                self.achievement_notebook.select(1)  # Select multiplication tab
+            # Count the answer and reweight the fact for problem selection
+            self.engine.submit(user_answer)
             
             if user_answer == correct_answer:
-                self.correct_count += 1
-                stats_dict[factor]["correct"] += 1
                 result_text = "Correct!"
                 self.answer_entry.config(foreground="green")
                 self.root.after(50, self.generate_problem)
             else:
-                self.wrong_count += 1
                 result_text = f"Wrong! The answer is {correct_answer}"
                 self.answer_entry.config(foreground="red")
                 self.root.after(50, self.generate_problem)
-                
-            # Update factor stat
-            stats_dict[factor]["total"] += 1
             
             # Update stats display
-            self.update_stats(vars_dict, stats_dict)
+            self.update_stats()
             
         except ValueError:
             self.problem_var.set("Please enter a valid number")
-            operation = self.current_problem["operation"]
-            if operation == "division":
-                display_text = f"{self.current_problem['num1']} ÷ {self.current_problem['num2']}"
-            else:  # multiplication
-                display_text = f"{self.current_problem['num1']} × {self.current_problem['num2']}"
+            problem = self.engine.current_problem
+            display_text = f"{problem['num1']} {OPERATION_SYMBOLS[problem['operation']]} {problem['num2']}"
             self.root.after(1500, lambda: self.problem_var.set(display_text))
 
+    def close(self):
+        """Snapshot and flush the progress store, then close the window."""
+        self.engine.close()
+        self.root.destroy()
+
     def on_answer_change(self, *args):
         """Called whenever the answer entry changes."""
         if len(self.answer_var.get()) > 0:
             try:
                 user_answer = int(self.answer_var.get())
-                correct_answer = self.current_problem["answer"]
+                correct_answer = self.engine.current_problem["answer"]
 
                 if user_answer == correct_answer:
                     self.check_answer()
             except ValueError:
                 pass
 
-    def update_stats(self, vars_dict=None, stats_dict=None):
-        """Update the statistics display."""
-        self.correct_var.set(f"Correct: {self.correct_count}")
-        self.wrong_var.set(f"Wrong: {self.wrong_count}")
-        
-        # Update achievement percentages if specified
-        if vars_dict and stats_dict:
-            for factor, stats in stats_dict.items():
-                if stats["total"] > 0:
-                    percentage = round((stats["correct"] / stats["total"]) * 100)
-                    if self.current_problem["operation"] == "division":
-                        vars_dict[factor].set(f"÷{factor}: {percentage}%")
-                    else:  # multiplication
-                        vars_dict[factor].set(f"×{factor}: {percentage}%")
-
-        # Update all division stats
-        for divisor, stats in self.division_stats.items():
-            if stats["total"] > 0:
-                percentage = round((stats["correct"] / stats["total"]) * 100)
-                self.division_vars[divisor].set(f"÷{divisor}: {percentage}%")
-        
-        # Update all multiplication stats
-        for factor, stats in self.multiplication_stats.items():
-            if stats["total"] > 0:
-                percentage = round((stats["correct"] / stats["total"]) * 100)
-                self.multiplication_vars[factor].set(f"×{factor}: {percentage}%")
+    def update_stats(self):
+        """Queue a statistics display refresh, coalesced into one per event-loop turn."""
+        if self.stats_refresh is None:
+            self.stats_refresh = self.root.after_idle(self.flush_stats)
+    
+    def flush_stats(self):
+        """Push the values that changed since the last refresh to the display."""
+        self.stats_refresh = None
+        for key in self.stats.take_dirty():
+            if key == "correct":
+                self.correct_var.set(f"Correct: {self.stats.correct_count}")
+            elif key == "wrong":
+                self.wrong_var.set(f"Wrong: {self.stats.wrong_count}")
+            else:
+                operation, factor = key
+                self.stat_vars[operation][factor].set(self.stat_text(operation, factor))
+    
+    def stat_text(self, operation, factor):
+        """Achievement label for a factor: share correct, then median/p90 response time on a second line."""
+        text = f"{OPERATION_SYMBOLS[operation]}{factor}: {self.stats.percentage(operation, factor)}%"
+        median, p90 = self.stats.timing(operation, factor)
+        # Always two lines, so the tab does not grow when the first timing comes in
+        return f"{text}\n{median:.1f}/{p90:.1f}s" if median is not None else f"{text}\n-"
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mental math trainer")
+    parser.add_argument("--progress", default="calcul_progress.db", help="where progress is kept between sessions")
+    parser.add_argument("--no-progress", action="store_true", help="start from zero and keep nothing")
+    parser.add_argument("--profile", metavar="TRACE", help="time Tk callbacks and write a Chrome trace here on exit")
+    args = parser.parse_args()
+    
+    # Started before any widget exists so every callback gets wrapped
+    profiler = TkProfiler().start() if args.profile else None
+    
     root = tk.Tk()
-    app = MentalMathTrainer(root)
-    root.mainloop()
+    app = MentalMathTrainer(root, None if args.no_progress else ProgressStore(args.progress))
+    try:
+        root.mainloop()
+    finally:
+        if profiler is not None:
+            profiler.finish(args.profile)
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import numpy as np
+import pyaudio
+
+EARS = ('left', 'right')
+
+# Corrections are clamped so a bad measurement can never push tones far past what was asked for
+MAX_CORRECTION_DB = 20
+
+class Calibration:
+    """Per-ear level corrections (dB) for one station, interpolated over log frequency"""
+    def __init__(self, frequencies, corrections, response_db=None, created=None, target_db=None):
+        self.frequencies = np.asarray(frequencies, dtype=float)
+        self.corrections = np.asarray(corrections, dtype=float)  # (ear, frequency)
+        self.response_db = self.corrections * 0 if response_db is None else np.asarray(response_db, dtype=float)
+        self.created = time.time() if created is None else created
+        self.target_db = target_db  # Measured level every tone was corrected to, None if unknown
+    
+    def correction(self, ear, frequency):
+        """dB to add to a requested level at this ear and frequency"""
+        return float(np.interp(np.log2(frequency), np.log2(self.frequencies),
+                               self.corrections[EARS.index(ear)]))
+    
+    def table(self, frequencies):
+        """Corrections for a set of frequencies, keyed by (ear, frequency)"""
+        return {(ear, freq): self.correction(ear, freq) for ear in EARS for freq in frequencies}
+    
+    def save(self, path):
+        np.savez(path, frequencies=self.frequencies, corrections=self.corrections,
+                 response_db=self.response_db, created=self.created,
+                 target_db=np.nan if self.target_db is None else self.target_db)
+    
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            target_db = float(data['target_db']) if 'target_db' in data.files else np.nan
+            return cls(data['frequencies'], data['corrections'], data['response_db'], float(data['created']),
+                       None if np.isnan(target_db) else target_db)
+
+def load_calibration(path):
+    """Load a cached calibration, or None if the station was never calibrated"""
+    if path is None or not os.path.exists(path):
+        return None
+    return Calibration.load(path)
+
+def exponential_sweep(f1, f2, duration, sample_rate, level_db=-20, fade=0.01):
+    """Exponential sine sweep from f1 to f2 Hz with short fades at both ends"""
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    rate = duration / np.log(f2 / f1)
+    sweep = np.sin(2 * np.pi * f1 * rate * (np.exp(t / rate) - 1))
+    
+    # Raised-cosine fades keep the edges from splattering energy across the band
+    n_fade = int(fade * sample_rate)
+    ramp = 0.5 - 0.5 * np.cos(np.pi * np.arange(n_fade) / n_fade)
+    sweep[:n_fade] *= ramp
+    sweep[-n_fade:] *= ramp[::-1]
+    return (sweep * 10 ** (level_db / 20)).astype(np.float32)
+
+def play_and_record(p, signal, sample_rate, tail=1.0, input_channel=0, frames_per_buffer=1024,
+                    input_device=None, output_device=None):
+    """Play an (n, 2) signal on a full-duplex stream and return the recorded input channel"""
+    total = len(signal) + int(tail * sample_rate)
+    output = np.zeros((total, 2), dtype=np.float32)
+    output[:len(signal)] = signal
+    recorded = np.zeros((total, 2), dtype=np.float32)
+    position = 0
+    done = threading.Event()
+    
+    def callback(in_data, frame_count, time_info, status):
+        nonlocal position
+        n = min(frame_count, total - position)
+        recorded[position:position + n] = np.frombuffer(in_data, dtype=np.float32).reshape(-1, 2)[:n]
+        block = np.zeros((frame_count, 2), dtype=np.float32)
+        block[:n] = output[position:position + n]
+        position += frame_count
+        if position >= total:
+            done.set()
+            return block.tobytes(), pyaudio.paComplete
+        return block.tobytes(), pyaudio.paContinue
+    
+    stream = p.open(format=pyaudio.paFloat32, channels=2, rate=sample_rate, input=True, output=True,
+                    frames_per_buffer=frames_per_buffer, input_device_index=input_device,
+                    output_device_index=output_device, stream_callback=callback)
+    try:
+        done.wait(total / sample_rate + 5)
+    finally:
+        stream.stop_stream()
+        stream.close()
+    return recorded[:, input_channel]
+
+def deconvolve(recordings, sweep, sample_rate, frequencies, band=(30, 18000), window=0.05):
+    """Frequency response (dB) at each frequency for a stack of sweep recordings, shaped (recording, frequency)"""
+    recordings = np.atleast_2d(recordings)
+    n = recordings.shape[1]
+    nfft = 1 << int(np.ceil(np.log2(2 * n)))
+    
+    # Regularized spectral division, all recordings in one batch
+    X = np.fft.rfft(sweep, nfft)
+    Y = np.fft.rfft(recordings, nfft, axis=1)
+    bins = np.fft.rfftfreq(nfft, 1 / sample_rate)
+    power = np.abs(X) ** 2
+    in_band = (bins >= band[0]) & (bins <= band[1])
+    eps = np.where(in_band, 1e-6, 1.0) * power.max()
+    H = Y * np.conj(X) / (power + eps)
+    
+    # Keep the linear impulse response around its peak, harmonic distortion lands well before it
+    ir = np.fft.irfft(H, nfft, axis=1)
+    peaks = np.abs(ir).argmax(axis=1)
+    pre = int(0.001 * sample_rate)
+    length = int(window * sample_rate)
+    taper = np.hanning(2 * length)[length:]
+    windowed = np.zeros((len(recordings), length + pre))
+    for i, peak in enumerate(peaks):
+        windowed[i] = np.roll(ir[i], pre - peak)[:length + pre]
+    windowed[:, pre:] *= taper
+    
+    # Average magnitude over a third-octave band around each frequency
+    response = np.abs(np.fft.rfft(windowed, nfft, axis=1))
+    result = np.empty((len(recordings), len(frequencies)))
+    for j, freq in enumerate(frequencies):
+        lo, hi = np.searchsorted(bins, [freq * 2 ** (-1 / 6), freq * 2 ** (1 / 6)])
+        result[:, j] = 20 * np.log10(np.sqrt((response[:, lo:hi] ** 2).mean(axis=1)) + 1e-12)
+    return result
+
+def calibrate(p, frequencies, sample_rate=44100, duration=3.0, level_db=-20, reference_frequency=1000,
+              target_db=None, **stream_options):
+    """Sweep each ear once, measure its response and derive level corrections towards target_db"""
+    sweep = exponential_sweep(20, sample_rate / 2 * 0.9, duration, sample_rate, level_db)
+    
+    # One sweep per channel, the other channel silent
+    recordings = []
+    for channel in range(len(EARS)):
+        signal = np.zeros((len(sweep), 2), dtype=np.float32)
+        signal[:, channel] = sweep
+        recordings.append(play_and_record(p, signal, sample_rate, **stream_options))
+    
+    measure_at = sorted(set(frequencies) | {reference_frequency})
+    response_db = deconvolve(np.stack(recordings), sweep, sample_rate, measure_at)
+    
+    # Bring both ears to the target level. The default, the mean of both ears at the reference frequency,
+    # is relative to this station: it flattens the response but keeps the station's overall level.
+    # Stations only match when they share a target_db measured with the same microphone and gain.
+    if target_db is None:
+        target_db = float(response_db[:, measure_at.index(reference_frequency)].mean())
+    corrections = np.clip(target_db - response_db, -MAX_CORRECTION_DB, MAX_CORRECTION_DB)
+    return Calibration(measure_at, corrections, response_db, target_db=target_db)
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Calibrate headphone levels with one sweep per ear")
+    parser.add_argument("--output", default="calibration.npz", help="where to cache the correction table")
+    parser.add_argument("--duration", type=float, default=3.0, help="sweep length (s)")
+    parser.add_argument("--level", type=float, default=-20, help="sweep level (dBFS)")
+    parser.add_argument("--input-device", type=int, help="PyAudio input device index")
+    parser.add_argument("--output-device", type=int, help="PyAudio output device index")
+    parser.add_argument("--input-channel", type=int, default=0, help="input channel the microphone is on")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--target-db", type=float,
+                        help="measured level to correct every tone to, shared by all stations "
+                             "(default: this station's own 1 kHz level, which only flattens its response)")
+    target.add_argument("--reference", metavar="PATH",
+                        help="use the target level of another station's calibration file")
+    args = parser.parse_args()
+    
+    target_db = args.target_db
+    if args.reference is not None:
+        target_db = Calibration.load(args.reference).target_db
+        if target_db is None:
+            parser.error(f"'{args.reference}' does not record its target level, recalibrate that station first")
+    
+    frequencies = [250, 500, 1000, 2000, 3000, 4000, 6000, 8000]
+    p = pyaudio.PyAudio()
+    try:
+        calibration = calibrate(p, frequencies, duration=args.duration, level_db=args.level,
+                                input_device=args.input_device, output_device=args.output_device,
+                                input_channel=args.input_channel, target_db=target_db)
+    finally:
+        p.terminate()
+    
+    calibration.save(args.output)
+    print(f"Calibration saved as '{args.output}' (target {calibration.target_db:.1f} dB)")
+    for e, ear in enumerate(EARS):
+        print(f"\n{ear.upper()} EAR:")
+        for freq, response, correction in zip(calibration.frequencies, calibration.response_db[e],
+                                              calibration.corrections[e]):
+            print(f"  {freq:.0f} Hz: response {response:6.1f} dB, correction {correction:+5.1f} dB")
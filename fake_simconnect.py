@@ -0,0 +1,160 @@
+import bisect
+import csv
+import random
+import time
+
+# (duration s, vertical speed ft/min, rpm) segments of the synthetic circuit, altitude is integrated from them
+SYNTHETIC_PROFILE = (
+    (20, 0, 800),       # Ground
+    (90, 700, 2500),    # Climb
+    (60, 0, 2200),      # Cruise
+    (40, 300, 2400),    # Step climb
+    (120, 0, 2200),     # Cruise
+    (150, -500, 1500),  # Descent
+    (20, 0, 900),       # Level off
+)
+
+def synthetic_track(profile=SYNTHETIC_PROFILE, step=0.5):
+    """Sampled (time s, altitude ft, vertical speed ft/min, rpm) columns of a segment profile"""
+    times, altitudes, varios, rpms = [], [], [], []
+    t = altitude = 0.0
+    for duration, vario, rpm in profile:
+        for _ in range(int(duration / step)):
+            times.append(t)
+            altitudes.append(altitude)
+            varios.append(float(vario))
+            rpms.append(float(rpm))
+            t += step
+            altitude = max(altitude + vario / 60 * step, 0.0)
+    return times, altitudes, varios, rpms
+
+def load_track(path):
+    """Recorded (time, altitude, vertical_speed, rpm) columns from a CSV with those headers, times from 0"""
+    with open(path, newline="") as f:
+        rows = [(float(row["time"]), float(row["altitude"]), float(row["vertical_speed"]), float(row["rpm"]))
+                for row in csv.DictReader(f)]
+    rows.sort()
+    times, altitudes, varios, rpms = (list(column) for column in zip(*rows))
+    # Recordings rarely start at 0, playback does
+    return [t - times[0] for t in times], altitudes, varios, rpms
+
+class SimConnect:
+    """Stand-in for SimConnect.SimConnect that plays a flight track instead of talking to MSFS"""
+    attempts = 0   # Failed connection attempts so far, across instances
+    epoch = None   # When the first instance was made, outages are timed from it across reconnects
+    
+    def __init__(self, auto_connect=True, library_path=None, track=None, speed=1.0, latency=0.0, jitter=0.0,
+                 dropout=0.0, outage_every=None, outage_length=5.0, connect_failures=0, seed=None):
+        self.rng = random.Random(seed)
+        self.times, self.altitudes, self.varios, self.rpms = synthetic_track() if track is None else track
+        self.duration = self.times[-1] + (self.times[1] - self.times[0] if len(self.times) > 1 else 1.0)
+        self.speed = speed                    # Simulated seconds per real second
+        self.latency = latency                # Mean seconds per request
+        self.jitter = jitter                  # Extra uniform 0..jitter seconds per request
+        self.dropout = dropout                # Chance a request comes back empty
+        self.outage_every = outage_every      # Real seconds between link outages, None for none
+        self.outage_length = outage_length
+        self.start = time.monotonic()
+        self.ok = True
+        self.requests = 0
+        if SimConnect.epoch is None:
+            SimConnect.epoch = self.start
+        
+        # Like the real one, connecting fails while the simulator is not up
+        if connect_failures and SimConnect.attempts < connect_failures:
+            SimConnect.attempts += 1
+            raise ConnectionError("fake simulator not running yet")
+        if self.in_outage():
+            raise ConnectionError("fake simulator not answering")
+    
+    def sim_time(self):
+        """Position in the track (s), looping at the end"""
+        return ((time.monotonic() - self.start) * self.speed) % self.duration
+    
+    def in_outage(self):
+        if self.outage_every is None:
+            return False
+        return (time.monotonic() - SimConnect.epoch) % self.outage_every > self.outage_every - self.outage_length
+    
+    def sample(self, column):
+        """Linearly interpolated value of one column at the current track time"""
+        t = self.sim_time()
+        i = bisect.bisect_right(self.times, t) - 1
+        if i + 1 >= len(self.times):
+            return column[i]
+        t0, t1 = self.times[i], self.times[i + 1]
+        return column[i] + (column[i + 1] - column[i]) * (t - t0) / (t1 - t0)
+    
+    def exit(self):
+        self.ok = False
+
+class AircraftRequests:
+    """Stand-in for SimConnect.AircraftRequests, answering the variables the overlay reads"""
+    def __init__(self, sm, _time=2000, _attemps=10):
+        self.sm = sm
+        self.columns = {
+            "PLANE_ALTITUDE": sm.altitudes,
+            "VERTICAL_SPEED": sm.varios,
+            "GENERAL_ENG_RPM:1": sm.rpms,
+        }
+    
+    def get(self, key):
+        sm = self.sm
+        sm.requests += 1
+        delay = sm.latency + sm.rng.uniform(0, sm.jitter)
+        if delay:
+            time.sleep(delay)
+        if not sm.ok or sm.in_outage():
+            raise OSError("fake simulator link down")
+        if sm.rng.random() < sm.dropout:
+            return None
+        column = self.columns.get(key)
+        return None if column is None else sm.sample(column)
+
+def connector(**options):
+    """Connect callable for telemetry.TelemetryPoller that opens fake sessions"""
+    def connect():
+        sm = SimConnect(**options)
+        return AircraftRequests(sm), sm.exit
+    return connect
+
+if __name__ == "__main__":
+    import argparse
+    from collections import Counter
+    from sepia import flight_regime
+    from telemetry import TelemetryPoller
+    
+    parser = argparse.ArgumentParser(description="Load-test the telemetry path against the fake simulator")
+    parser.add_argument("--track", help="CSV with time, altitude, vertical_speed, rpm columns (synthetic if omitted)")
+    parser.add_argument("--rate", type=float, default=100.0, help="poller samples per second")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run")
+    parser.add_argument("--speed", type=float, default=50.0, help="simulated seconds per real second")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean request latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random request latency (s)")
+    parser.add_argument("--dropout", type=float, default=0.0, help="chance a request comes back empty")
+    parser.add_argument("--outage-every", type=float, help="seconds between link outages")
+    parser.add_argument("--outage-length", type=float, default=2.0, help="length of each outage (s)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    
+    connect = connector(track=None if args.track is None else load_track(args.track), speed=args.speed,
+                        latency=args.latency, jitter=args.jitter, dropout=args.dropout,
+                        outage_every=args.outage_every, outage_length=args.outage_length, seed=args.seed)
+    poller = TelemetryPoller(connect, rate=args.rate, initial_backoff=0.2, max_backoff=2.0).start()
+    
+    # Read the latest sample the way the overlay does, at the display rate
+    regimes = Counter()
+    states = Counter()
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        states[poller.state] += 1
+        sample = poller.latest
+        if sample.ok:
+            regimes[flight_regime(sample.vertical_speed)[0]] += 1
+        time.sleep(0.05)
+    poller.stop()
+    
+    print(f"{poller.samples} samples in {args.seconds:.0f} s ({poller.samples / args.seconds:.0f}/s, "
+          f"asked for {args.rate:.0f}/s), {poller.failures} failed, {poller.connections} connections")
+    print("Link state:", ", ".join(f"{state} {count / sum(states.values()) * 100:.0f}%" for state, count in states.items()))
+    print("Regimes:", ", ".join(f"{regime} {count}" for regime, count in regimes.most_common()))
@@ -0,0 +1,245 @@
+import collections
+import os
+import sys
+import time
+import numpy as np
+from background_writer import BackgroundWriter
+
+MAGIC = b'EOPANFLT'
+VERSION = 1
+
+HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('chunk', '<u4'), ('rate', '<f8'), ('started', '<u8')])
+
+# Sample columns; time_ns is time.monotonic_ns(), event is a bitmask of EVENTS
+COLUMNS = (
+    ('time_ns', '<i8'),
+    ('altitude', '<f4'),
+    ('vertical_speed', '<f4'),
+    ('rpm', '<f4'),
+    ('ok', 'u1'),
+    ('event', 'u1'),
+)
+
+# Overlay events marked between two samples
+EVENTS = {'arithmetic': 1, 'answer': 2, 'digit': 4, 'image': 8, 'phase_end': 16, 'reset': 32}
+
+def chunk_dtype(chunk):
+    """One chunk on disk and in the ring: a sample count, then each column as a contiguous block"""
+    return np.dtype([('count', '<u8')] + [(name, dtype, (chunk,)) for name, dtype in COLUMNS])
+
+class FlightRecorder:
+    """Appends telemetry samples to a memory-mapped ring that survives a killed process, full chunks are spilled to the flight file"""
+    def __init__(self, path, rate, chunk=1024, ring_chunks=8):
+        self.path = path
+        self.chunk = chunk
+        self.dtype = chunk_dtype(chunk)
+        self.ring_chunks = ring_chunks
+        self.written = 0  # Samples appended so far
+        self.dropped = 0  # Samples overwritten before they could be spilled
+        self.marks = collections.deque()
+        
+        # A ring left behind by a crash: finish that flight and keep it next to the new one
+        self.recovered = None
+        if os.path.exists(path + '.ring'):
+            try:
+                recover(path)
+            except ValueError:
+                os.replace(path + '.ring', path + '.crashed.ring')  # Unusable here, but never thrown away
+            if os.path.exists(path):
+                self.recovered = path + '.crashed'
+                os.replace(path, self.recovered)
+        
+        # Preallocated ring next to the flight file, with the same header so it can be read, and recovered, on its own.
+        # The OS pages it out, so a crash keeps the unspilled tail
+        header = np.array([(MAGIC, VERSION, chunk, rate, time.time_ns())], dtype=HEADER).tobytes()
+        with open(path + '.ring', 'wb') as f:
+            f.write(header)
+            f.truncate(HEADER.itemsize + ring_chunks * self.dtype.itemsize)
+        self.ring = np.memmap(path + '.ring', dtype=self.dtype, mode='r+', offset=HEADER.itemsize, shape=(ring_chunks,))
+        self.columns = [np.asarray(self.ring[name]) for name, _ in COLUMNS]  # (ring_chunks, chunk) views
+        self.counts = np.asarray(self.ring['count'])
+        
+        # Flushed after every write, so a killed process leaves everything spilled so far in the file
+        self.file = open(path, 'wb')
+        self.file.write(header)
+        self.file.flush()
+        
+        # Full chunks are spilled as soon as they are handed over, the ring only has room for ring_chunks of them
+        self.writer = BackgroundWriter(self._spill, 'flight-recorder', batch=ring_chunks, interval=0)
+    
+    def mark(self, event):
+        """Flag an overlay event, recorded with the next sample (any thread)"""
+        self.marks.append(EVENTS[event])
+    
+    def append(self, sample):
+        """Record one telemetry.Telemetry sample in the ring, where recover() finds it even if the process is killed"""
+        event = 0
+        while self.marks:
+            event |= self.marks.popleft()
+        slot, i = divmod(self.written, self.chunk)
+        k = slot % self.ring_chunks
+        time_ns, altitude, vertical_speed, rpm, ok, events = self.columns
+        time_ns[k, i] = sample.sampled_ns
+        altitude[k, i] = sample.altitude
+        vertical_speed[k, i] = sample.vertical_speed
+        rpm[k, i] = sample.rpm
+        ok[k, i] = sample.ok
+        events[k, i] = event
+        self.counts[k] = i + 1  # Live, so the ring alone tells which samples are real after a crash
+        self.written += 1
+        if i + 1 == self.chunk:
+            self.writer.put(slot)
+    
+    def _spill(self, slots):
+        for slot in slots:
+            # The sampler is a whole ring ahead, this chunk was overwritten
+            if self.written // self.chunk - slot >= self.ring_chunks:
+                self.dropped += self.chunk
+                continue
+            self.file.write(self.ring[slot % self.ring_chunks].tobytes())
+        self.file.flush()
+    
+    def flush(self):
+        """Wait until every full chunk so far is in the flight file"""
+        self.writer.flush()
+    
+    def close(self):
+        """Spill everything recorded, including the last partial chunk, and drop the ring; later calls do nothing"""
+        if self.writer.closed:
+            return
+        slot, count = divmod(self.written, self.chunk)
+        self.writer.close()
+        if count:
+            self.file.write(self.ring[slot % self.ring_chunks].tobytes())
+        self.file.close()
+        del self.ring, self.columns, self.counts
+        os.remove(self.path + '.ring')
+
+def read_chunks(path):
+    """Header and whole chunks of a flight file or ring, a chunk torn by a crash is left out"""
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f"{path} is not a flight recording")
+    dtype = chunk_dtype(int(header['chunk'][0]))
+    n_chunks = (os.path.getsize(path) - HEADER.itemsize) // dtype.itemsize
+    chunks = np.memmap(path, dtype=dtype, mode='r', offset=HEADER.itemsize, shape=(n_chunks,)) if n_chunks \
+        else np.zeros(0, dtype=dtype)
+    return header, chunks
+
+def ring_tail(ring, chunks):
+    """Chunks of a ring that never reached the flight file, oldest first"""
+    if ring.dtype != chunks.dtype:
+        raise ValueError("ring and flight file have different chunk sizes")
+    ring = np.array(ring)  # Copy, a live recorder keeps writing
+    ring = ring[ring['count'] > 0]
+    
+    # Spills are whole chunks and time only goes forward, so a chunk is unspilled if it starts after the file ends
+    last_ns = chunks['time_ns'][-1][chunks['count'][-1] - 1] if len(chunks) else np.iinfo(np.int64).min
+    ring = ring[ring['time_ns'][:, 0] > last_ns]
+    return ring[np.argsort(ring['time_ns'][:, 0])]
+
+def read_flight(path):
+    """Header and chunks of a recording, the flight file plus whatever only its ring still holds"""
+    ring = None
+    if os.path.exists(path + '.ring'):
+        ring_header, ring = read_chunks(path + '.ring')
+    try:
+        header, chunks = read_chunks(path)
+    except (OSError, ValueError):
+        # Killed before the flight file got its header: the ring has the same one
+        if ring is None:
+            raise
+        header, chunks = ring_header, np.zeros(0, dtype=ring.dtype)
+    if ring is not None:
+        chunks = np.concatenate([chunks, ring_tail(ring, chunks)])
+    return header, chunks
+
+def recover(path):
+    """Rewrite a crashed recording as one flight file and only then drop its ring, returns the samples in it"""
+    # A ring that cannot be read raises ValueError here and stays where it is
+    header, chunks = read_flight(path)
+    samples = int(chunks['count'].sum())
+    with open(path + '.tmp', 'wb') as f:
+        f.write(header.tobytes())
+        f.write(chunks.tobytes())
+    del chunks
+    os.replace(path + '.tmp', path)
+    os.remove(path + '.ring')
+    return samples
+
+def load_flight(path):
+    """A recorded flight as a dict of NumPy columns, plus 'rate' and 'started' (time.time_ns() at start)"""
+    # Still being recorded, or the recorder crashed: the newest samples are only in the ring
+    header, chunks = read_flight(path)
+    dtype = chunks.dtype
+    
+    # Keep the filled part of each chunk, then join them into one array per column
+    keep = np.arange(dtype['time_ns'].shape[0]) < chunks['count'][:, None]
+    flight = {name: np.asarray(chunks[name][keep]) for name, _ in COLUMNS}
+    flight['rate'] = float(header['rate'][0])
+    flight['started'] = int(header['started'][0])
+    return flight
+
+def summarize(flight):
+    """Print time and overlay events per flight regime"""
+    from sepia import flight_regime
+    
+    times = flight['time_ns']
+    print(f"{len(times)} samples over {(times[-1] - times[0]) / 1e9 if len(times) else 0:.0f} s "
+          f"at {flight['rate']:.0f} Hz, {np.mean(~flight['ok'].astype(bool)) * 100 if len(times) else 0:.1f}% without data")
+    if not len(times):
+        return
+    
+    # Each sample stands for the time until the next one
+    durations = np.diff(times, append=times[-1]) / 1e9
+    regimes = np.array([flight_regime(vario)[0] for vario in flight['vertical_speed']], dtype='U16')
+    regimes[~flight['ok'].astype(bool)] = "no data"
+    for regime in np.unique(regimes):
+        here = regimes == regime
+        events = ", ".join(f"{name} {np.count_nonzero(flight['event'][here] & bit)}" for name, bit in EVENTS.items())
+        print(f"  {regime:<9} {durations[here].sum():7.0f} s  {events}")
+
+def record_and_die(path, samples, chunk):
+    """Record synthetic samples, then SIGKILL this process before the recorder can close"""
+    import signal
+    from telemetry import Telemetry
+    
+    recorder = FlightRecorder(path, 20.0, chunk)
+    for i in range(samples):
+        recorder.append(Telemetry(1000.0 + i, 0.0, 2000.0, time.monotonic_ns(), True))
+    time.sleep(0.2)  # Let the spill thread write what it has, as it would over a real flight
+    os.kill(os.getpid(), signal.SIGKILL)
+
+def crash_check(path, samples, chunk=1024):
+    """Kill a recorder after samples appends in a child process, recover it and return how many samples came back"""
+    import multiprocessing
+    
+    child = multiprocessing.Process(target=record_and_die, args=(path, samples, chunk))
+    child.start()
+    child.join()
+    recover(path)
+    return len(load_flight(path)['time_ns'])
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Summarize recorded flights")
+    parser.add_argument("flights", nargs="*", help="flight files")
+    parser.add_argument("--recover", action="store_true",
+                        help="first write the ring of a crashed recording into its flight file")
+    parser.add_argument("--crash-check", type=int, metavar="SAMPLES",
+                        help="kill a recorder after this many samples, recover it and check they all came back")
+    args = parser.parse_args()
+    
+    if args.crash_check is not None:
+        path = args.flights[0] if args.flights else "crash_check.flt"
+        recovered = crash_check(path, args.crash_check)
+        print(f"{recovered} of {args.crash_check} samples recovered from a killed recorder")
+        if recovered != args.crash_check:
+            sys.exit(1)
+    else:
+        for path in args.flights:
+            print(path)
+            if args.recover and os.path.exists(path + '.ring'):
+                print(f"  recovered from the ring, {recover(path)} samples")
+            summarize(load_flight(path))
@@ -0,0 +1,619 @@
+import argparse
+import functools
+import heapq
+import math
+import random
+import time
+
+# Operand ranges the problems are drawn from
+DIVISORS = range(2, 10)
+QUOTIENTS = range(1, 201)  # Max 200 to avoid numbers > 1000
+FACTORS = range(2, 10)
+
+# Answers between progress snapshots, bounds what startup has to replay
+SNAPSHOT_EVERY = 200
+
+def division_facts(divisors=DIVISORS, quotients=QUOTIENTS):
+    """Every (dividend, divisor) pair with a natural number result"""
+    return [(quotient * divisor, divisor) for divisor in divisors for quotient in quotients]
+
+def multiplication_facts(factors1=FACTORS, factors2=FACTORS):
+    """Every (factor1, factor2) pair"""
+    return [(factor1, factor2) for factor1 in factors1 for factor2 in factors2]
+
+# Solution methods by operation, each takes (num1, num2, answer) and returns the explanation
+SOLUTION_METHODS = {}
+
+def solution_method(operation):
+    """Register a solution method for an operation."""
+    def register(method):
+        SOLUTION_METHODS[operation] = method
+        return method
+    return register
+
+@functools.lru_cache(maxsize=1024)
+def solution_text(operation, num1, num2, answer):
+    """Solution method text for one fact, memoized."""
+    return SOLUTION_METHODS[operation](num1, num2, answer)
+
+@solution_method("division")
+def division_solution(dividend, divisor, answer):
+    """Generate solution method for division using approximation approach."""
+    # Find nearest easy multiple
+    base_multiple = (dividend // divisor) * divisor
+    if abs((base_multiple + divisor) - dividend) < abs(base_multiple - dividend):
+        base_multiple += divisor
+    
+    if base_multiple == dividend:
+        # No approximation needed
+        return f"{dividend} ÷ {divisor} = {dividend // divisor}"
+    
+    # Calculate solution method
+    diff = base_multiple - dividend
+    solution = ""
+    
+    if diff > 0:  # We approximated up
+        solution = f"{dividend} ÷ {divisor}:\n"
+        solution += f"- Approximate to {base_multiple} (nearest easy multiple of {divisor})\n"
+        solution += f"- {base_multiple} ÷ {divisor} = {base_multiple // divisor}\n"
+        solution += f"- Difference: {base_multiple} - {dividend} = {diff}\n"
+        solution += f"- {diff} ÷ {divisor} = {diff // divisor}\n"
+        solution += f"- Result: {base_multiple // divisor} - {diff // divisor} = {answer}"
+    else:  # We approximated down
+        diff = abs(diff)
+        solution = f"{dividend} ÷ {divisor}:\n"
+        solution += f"- Approximate to {base_multiple} (nearest easy multiple of {divisor})\n"
+        solution += f"- {base_multiple} ÷ {divisor} = {base_multiple // divisor}\n"
+        solution += f"- Difference: {dividend} - {base_multiple} = {diff}\n"
+        solution += f"- {diff} ÷ {divisor} = {diff // divisor}\n"
+        solution += f"- Result: {base_multiple // divisor} + {diff // divisor} = {answer}"
+    
+    return solution
+
+@solution_method("multiplication")
+def multiplication_solution(factor1, factor2, answer):
+    """Generate solution method for multiplication using mental math strategies."""
+    # Different strategies based on the factors
+    solution = f"{factor1} × {factor2}:\n"
+    
+    # Strategy 1: Break down into tens and ones
+    if factor2 > 10:
+        tens = (factor2 // 10) * 10
+        ones = factor2 % 10
+        solution += f"Strategy 1: Break down into tens and ones\n"
+        solution += f"- {factor1} × {tens} = {factor1 * tens}\n"
+        solution += f"- {factor1} × {ones} = {factor1 * ones}\n"
+        solution += f"- Add: {factor1 * tens} + {factor1 * ones} = {answer}\n\n"
+    
+    # Strategy 2: Round and adjust
+    round_factor = 0
+    if factor2 < 10:
+        if factor2 < 5:
+            round_factor = 5
+        else:
+            round_factor = 10
+    else:
+        if factor2 < 15:
+            round_factor = 15
+        else:
+            round_factor = 20
+    
+    diff = round_factor - factor2
+    round_result = factor1 * round_factor
+    adjustment = factor1 * diff
+    
+    solution += f"Strategy 2: Round and adjust\n"
+    if diff > 0:  # We rounded up
+        solution += f"- Round {factor2} up to {round_factor}\n"
+        solution += f"- {factor1} × {round_factor} = {round_result}\n"
+        solution += f"- Adjustment: {factor1} × {diff} = {adjustment}\n"
+        solution += f"- Subtract: {round_result} - {adjustment} = {answer}"
+    else:  # We rounded down
+        diff = abs(diff)
+        adjustment = factor1 * diff
+        solution += f"- Round {factor2} down to {round_factor}\n"
+        solution += f"- {factor1} × {round_factor} = {round_result}\n"
+        solution += f"- Adjustment: {factor1} × {diff} = {adjustment}\n"
+        solution += f"- Add: {round_result} + {adjustment} = {answer}"
+    
+    return solution
+
+class FenwickTree:
+    """Prefix sums over weights with O(log n) updates and weighted draws"""
+    def __init__(self, weights):
+        self.weights = list(weights)
+        self.size = len(self.weights)
+        self.tree = [0.0] + self.weights
+        
+        # Build in O(n) by pushing each node into its parent
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        
+        self.top = 1 << self.size.bit_length() - 1 if self.size else 0
+    
+    def total(self):
+        """Sum of all weights"""
+        total = 0.0
+        i = self.size
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+    
+    def update(self, index, weight):
+        """Set the weight at index"""
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+    
+    def find(self, target):
+        """Index whose cumulative weight range contains target"""
+        position = 0
+        step = self.top
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] <= target:
+                position = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return min(position, self.size - 1)
+    
+    def sample(self, rng=random):
+        """Draw an index with probability proportional to its weight"""
+        return self.find(rng.random() * self.total())
+
+# Response time that counts as fluent, slower facts are drawn more often
+TARGET_RESPONSE_NS = 3_000_000_000
+RESPONSE_SMOOTHING = 0.3  # EWMA weight of the newest response time
+
+class LatencyHistogram:
+    """Response times in fixed log-spaced bins, O(1) per answer"""
+    MIN_NS = 100_000_000  # First bin edge (0.1 s)
+    RATIO = 1.1           # Each bin 10% wider than the last
+    BINS = 72             # Up to ~95 s, slower answers land in the last bin
+    
+    def __init__(self):
+        self.counts = [0] * self.BINS
+        self.total = 0
+    
+    def add(self, latency_ns):
+        """Count one response time"""
+        if latency_ns <= self.MIN_NS:
+            index = 0
+        else:
+            index = min(int(math.log(latency_ns / self.MIN_NS, self.RATIO)) + 1, self.BINS - 1)
+        self.counts[index] += 1
+        self.total += 1
+    
+    def percentile(self, q):
+        """Response time (s) at percentile q, the geometric centre of its bin, or None if empty"""
+        if not self.total:
+            return None
+        rank = q / 100 * self.total
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                break
+        if index == 0:
+            return self.MIN_NS / 1e9
+        return self.MIN_NS * self.RATIO ** (index - 0.5) / 1e9
+
+class FactIndex:
+    """Every fact of one operation with per-fact results and a weighted sampler over them"""
+    def __init__(self, facts):
+        self.facts = list(facts)
+        self.positions = {fact: i for i, fact in enumerate(self.facts)}
+        self.correct = [0] * len(self.facts)
+        self.wrong = [0] * len(self.facts)
+        self.response_ns = [None] * len(self.facts)  # EWMA of correct-answer response times
+        self.sampler = FenwickTree(self.weight(i) for i in range(len(self.facts)))
+    
+    def weight(self, i):
+        """Squared smoothed error rate, so a weak fact stands out against the many unseen ones, scaled by slowness"""
+        error_rate = (self.wrong[i] + 1) / (self.correct[i] + self.wrong[i] + 2)
+        weight = error_rate * error_rate + 0.01  # Mastered facts still come up now and then
+        if self.response_ns[i] is not None:
+            weight *= min(max(self.response_ns[i] / TARGET_RESPONSE_NS, 0.5), 4.0)
+        return weight
+    
+    def draw(self, rng=random):
+        """Pick a fact, favouring the ones answered wrong most often"""
+        return self.facts[self.sampler.sample(rng)]
+    
+    def record(self, fact, correct, latency_ns=None):
+        """Count an answer and its response time, and reweight the fact"""
+        i = self.positions.get(fact)
+        if i is None:
+            return
+        if correct:
+            self.correct[i] += 1
+        else:
+            self.wrong[i] += 1
+        if latency_ns is not None:
+            previous = self.response_ns[i]
+            self.response_ns[i] = latency_ns if previous is None else previous + RESPONSE_SMOOTHING * (latency_ns - previous)
+        self.sampler.update(i, self.weight(i))
+    
+    def state(self):
+        """Per-fact results as plain lists, in fact order"""
+        return {"correct": self.correct, "wrong": self.wrong, "response_ns": self.response_ns}
+    
+    def restore(self, state):
+        """Load results saved with state() and rebuild the sampler, ignored if the facts changed"""
+        if len(state["correct"]) != len(self.facts):
+            return
+        self.correct = list(state["correct"])
+        self.wrong = list(state["wrong"])
+        self.response_ns = list(state["response_ns"])
+        self.sampler = FenwickTree(self.weight(i) for i in range(len(self.facts)))
+
+class ReviewQueue:
+    """SM-2 spaced repetition over the facts of one operation, next due fact kept on a heap"""
+    LAPSE_DELAY_NS = 60_000_000_000                         # A missed fact comes back after a minute
+    STEPS_NS = (600_000_000_000, 86_400_000_000_000)         # Then 10 minutes and a day before intervals grow
+    MIN_EASINESS = 1.3
+    
+    def __init__(self):
+        # fact -> [easiness, interval_ns, repetitions, due_ns, version]
+        self.cards = {}
+        
+        # (due_ns, version, fact), superseded entries are skipped when they surface
+        self.heap = []
+    
+    def __len__(self):
+        return len(self.cards)
+    
+    @staticmethod
+    def grade(correct, latency_ns=None):
+        """SM-2 quality (0-5) of an answer: wrong, slow, fluent"""
+        if not correct:
+            return 1
+        if latency_ns is None:
+            return 4
+        if latency_ns <= TARGET_RESPONSE_NS:
+            return 5
+        return 4 if latency_ns <= 2 * TARGET_RESPONSE_NS else 3
+    
+    def review(self, fact, quality, now_ns):
+        """Reschedule a fact after an answer of the given quality"""
+        easiness, interval_ns, repetitions, _, version = self.cards.get(fact, (2.5, 0, 0, 0, 0))
+        easiness = max(self.MIN_EASINESS, easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        if quality < 3:
+            repetitions = 0
+            interval_ns = self.LAPSE_DELAY_NS
+        else:
+            repetitions += 1
+            if repetitions <= len(self.STEPS_NS):
+                interval_ns = self.STEPS_NS[repetitions - 1]
+            else:
+                interval_ns = int(interval_ns * easiness)
+        self.schedule(fact, [easiness, interval_ns, repetitions, now_ns + interval_ns, version + 1])
+    
+    def schedule(self, fact, card):
+        self.cards[fact] = card
+        heapq.heappush(self.heap, (card[3], card[4], fact))
+        
+        # Rebuild once superseded entries outnumber the live ones
+        if len(self.heap) > 2 * len(self.cards) + 64:
+            self.heap = [(card[3], card[4], fact) for fact, card in self.cards.items()]
+            heapq.heapify(self.heap)
+    
+    def due(self, now_ns):
+        """The fact due longest ago, or None if nothing is due yet"""
+        while self.heap:
+            due_ns, version, fact = self.heap[0]
+            if self.cards[fact][4] != version:
+                heapq.heappop(self.heap)
+                continue
+            return fact if due_ns <= now_ns else None
+        return None
+    
+    def state(self):
+        """Cards as plain lists"""
+        return [[num1, num2, easiness, interval_ns, repetitions, due_ns]
+                for (num1, num2), (easiness, interval_ns, repetitions, due_ns, _) in self.cards.items()]
+    
+    def restore(self, state):
+        """Load cards saved with state()"""
+        self.cards = {(num1, num2): [easiness, interval_ns, repetitions, due_ns, 0]
+                      for num1, num2, easiness, interval_ns, repetitions, due_ns in state}
+        self.heap = [(card[3], 0, fact) for fact, card in self.cards.items()]
+        heapq.heapify(self.heap)
+
+# Symbol shown in front of each factor in the achievement notebook
+OPERATION_SYMBOLS = {"division": "÷", "multiplication": "×"}
+
+class StatsModel:
+    """Running answer counters, tracking which displayed values changed since the last refresh"""
+    def __init__(self, factors):
+        self.correct_count = 0
+        self.wrong_count = 0
+        
+        # operation -> factor -> counters
+        self.factors = {
+            operation: {factor: {"correct": 0, "total": 0} for factor in operation_factors}
+            for operation, operation_factors in factors.items()
+        }
+        
+        # operation -> factor -> response times of correct answers
+        self.latencies = {
+            operation: {factor: LatencyHistogram() for factor in operation_factors}
+            for operation, operation_factors in factors.items()
+        }
+        
+        # Last (percentage, median, p90) handed to the display per (operation, factor)
+        self.shown = {}
+        self.touched = set()  # Factors answered since the last refresh
+        self.dirty = set()
+    
+    def record(self, operation, factor, correct, latency_ns=None):
+        """Count one answer and its response time, the display values are compared on refresh"""
+        stats = self.factors[operation][factor]
+        stats["total"] += 1
+        if correct:
+            stats["correct"] += 1
+            self.correct_count += 1
+            self.dirty.add("correct")
+        else:
+            self.wrong_count += 1
+            self.dirty.add("wrong")
+        if latency_ns is not None:
+            self.latencies[operation][factor].add(latency_ns)
+        self.touched.add((operation, factor))
+    
+    def percentage(self, operation, factor):
+        """Share of correct answers for a factor, rounded to a whole percent"""
+        stats = self.factors[operation][factor]
+        return round((stats["correct"] / stats["total"]) * 100) if stats["total"] else 0
+    
+    def timing(self, operation, factor):
+        """Median and p90 response time (s) for a factor, rounded to a tenth, None while unmeasured"""
+        histogram = self.latencies[operation][factor]
+        if not histogram.total:
+            return (None, None)
+        return (round(histogram.percentile(50), 1), round(histogram.percentile(90), 1))
+    
+    def take_dirty(self):
+        """Return and clear the display values that changed"""
+        for key in self.touched:
+            shown = (self.percentage(*key),) + self.timing(*key)
+            if self.shown.get(key) != shown:
+                self.shown[key] = shown
+                self.dirty.add(key)
+        self.touched.clear()
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+    
+    def state(self):
+        """Counters and histograms as plain JSON-ready values"""
+        return {
+            "correct": self.correct_count,
+            "wrong": self.wrong_count,
+            "factors": {
+                operation: {str(factor): [stats["correct"], stats["total"], self.latencies[operation][factor].counts]
+                            for factor, stats in operation_stats.items()}
+                for operation, operation_stats in self.factors.items()
+            }
+        }
+    
+    def restore(self, state):
+        """Load counters saved with state(), every display value is refreshed"""
+        self.correct_count = state["correct"]
+        self.wrong_count = state["wrong"]
+        self.dirty.update(("correct", "wrong"))
+        for operation, operation_stats in state["factors"].items():
+            for factor, (correct, total, counts) in operation_stats.items():
+                factor = int(factor)
+                if factor not in self.factors.get(operation, {}):
+                    continue
+                self.factors[operation][factor].update(correct=correct, total=total)
+                histogram = self.latencies[operation][factor]
+                if len(counts) == len(histogram.counts):
+                    histogram.counts = list(counts)
+                    histogram.total = sum(counts)
+                self.touched.add((operation, factor))
+
+class MathEngine:
+    """Problem selection, answer checking and statistics, independent of any UI"""
+    def __init__(self, store=None, rng=random, clock=time.monotonic_ns, wall_clock=time.time_ns):
+        self.rng = rng
+        self.clock = clock            # Times responses
+        self.wall_clock = wall_clock  # Schedules reviews, kept across sessions
+        
+        self.current_problem = {"num1": 0, "num2": 0, "operation": "", "answer": 0}
+        self.problem_shown_ns = None  # When the current problem was handed out
+        self.spaced_repetition = True
+        
+        self.stats = StatsModel({"division": DIVISORS, "multiplication": FACTORS})
+        
+        # Weighted problem selection over every fact of each operation
+        self.fact_index = {
+            "division": FactIndex(division_facts()),
+            "multiplication": FactIndex(multiplication_facts())
+        }
+        
+        # Spaced repetition, due facts come before fresh draws from the index
+        self.reviews = {operation: ReviewQueue() for operation in self.fact_index}
+        
+        # Progress carried over from earlier sessions
+        self.store = store
+        self.answers_since_snapshot = 0
+        if self.store is not None:
+            self.load_progress()
+    
+    def next_problem(self, operation):
+        """Pick the next problem of an operation and start timing it"""
+        num1, num2 = self.next_fact(operation)
+        self.current_problem = {
+            "num1": num1,
+            "num2": num2,
+            "operation": operation,
+            "answer": num1 // num2 if operation == "division" else num1 * num2
+        }
+        self.problem_shown_ns = self.clock()
+        return self.current_problem
+    
+    def next_fact(self, operation):
+        """The most overdue review when spaced repetition is on, else a weighted draw"""
+        if self.spaced_repetition:
+            fact = self.reviews[operation].due(self.wall_clock())
+            if fact is not None and fact != (self.current_problem["num1"], self.current_problem["num2"]):
+                return fact
+        return self.fact_index[operation].draw(self.rng)
+    
+    def submit(self, answer):
+        """Check and count an answer to the current problem, returns (correct, response time in ns or None)"""
+        answered_ns = self.clock()
+        problem = self.current_problem
+        correct = answer == problem["answer"]
+        
+        # Time to a correct answer, each problem is timed once
+        latency_ns = None
+        if correct and self.problem_shown_ns is not None:
+            latency_ns = answered_ns - self.problem_shown_ns
+            self.problem_shown_ns = None
+        
+        self.apply_answer(problem["operation"], problem["num1"], problem["num2"], correct, latency_ns)
+        self.save_answer(problem["operation"], problem["num1"], problem["num2"], correct, latency_ns)
+        return correct, latency_ns
+    
+    def apply_answer(self, operation, num1, num2, correct, latency_ns=None, answered_ns=None):
+        """Count one answer in the statistics, the fact index and the review schedule"""
+        factor = num2 if operation == "division" else num1  # divisor or first factor
+        self.stats.record(operation, factor, correct, latency_ns)
+        self.fact_index[operation].record((num1, num2), correct, latency_ns)
+        self.reviews[operation].review((num1, num2), ReviewQueue.grade(correct, latency_ns),
+                                       self.wall_clock() if answered_ns is None else answered_ns)
+    
+    def save_answer(self, operation, num1, num2, correct, latency_ns=None):
+        """Log one answer to the progress store, snapshotting the totals now and then"""
+        if self.store is None:
+            return
+        self.store.record(operation, num1, num2, correct, latency_ns)
+        self.answers_since_snapshot += 1
+        if self.answers_since_snapshot >= SNAPSHOT_EVERY:
+            self.save_snapshot()
+    
+    def save_snapshot(self):
+        """Hand the current totals to the progress store"""
+        self.store.snapshot({
+            "stats": self.stats.state(),
+            "facts": {operation: index.state() for operation, index in self.fact_index.items()},
+            "reviews": {operation: queue.state() for operation, queue in self.reviews.items()}
+        })
+        self.answers_since_snapshot = 0
+    
+    def load_progress(self):
+        """Restore the last snapshot and replay the few answers logged after it"""
+        state, answers = self.store.load()
+        if state is not None:
+            self.stats.restore(state["stats"])
+            for operation, index_state in state["facts"].items():
+                if operation in self.fact_index:
+                    self.fact_index[operation].restore(index_state)
+            for operation, cards in state.get("reviews", {}).items():
+                if operation in self.reviews:
+                    self.reviews[operation].restore(cards)
+        for answer in answers:
+            self.apply_answer(*answer)
+        self.answers_since_snapshot = len(answers)
+    
+    def close(self):
+        """Snapshot and flush the progress store"""
+        if self.store is None:
+            return
+        if self.answers_since_snapshot:
+            self.save_snapshot()
+        self.store.close()
+
+class SimulatedClock:
+    """Stand-in for time.monotonic_ns / time.time_ns that only moves when told to"""
+    def __init__(self, start_ns=0):
+        self.now_ns = start_ns
+    
+    def __call__(self):
+        return self.now_ns
+    
+    def advance(self, ns):
+        self.now_ns += ns
+
+class SimulatedSolver:
+    """Answers problems with a set accuracy and log-normal response times, a share of facts being harder"""
+    def __init__(self, accuracy=0.9, latency=2.0, spread=0.4, weak_share=0.1, weak_accuracy=0.5, seed=None):
+        self.accuracy = accuracy
+        self.latency = latency          # Median response time (s)
+        self.spread = spread            # Log-normal sigma of response times
+        self.weak_share = weak_share
+        self.weak_accuracy = weak_accuracy
+        self.rng = random.Random(seed)
+        self.weak = {}                  # fact -> whether it is one of the hard ones
+    
+    def is_weak(self, fact):
+        weak = self.weak.get(fact)
+        if weak is None:
+            weak = self.weak[fact] = self.rng.random() < self.weak_share
+        return weak
+    
+    def respond(self, problem):
+        """Return (answer, response time in ns) for a problem"""
+        fact = (problem["operation"], problem["num1"], problem["num2"])
+        weak = self.is_weak(fact)
+        correct = self.rng.random() < (self.weak_accuracy if weak else self.accuracy)
+        latency_ns = int(self.rng.lognormvariate(math.log(self.latency * (2 if weak else 1)), self.spread) * 1e9)
+        return problem["answer"] if correct else problem["answer"] + 1, latency_ns
+
+def simulate(problems, operation="division", solver=None, spaced_repetition=True, seed=None):
+    """Drive a headless engine with a simulated solver on a simulated clock, returns the engine and solver"""
+    solver = SimulatedSolver(seed=seed) if solver is None else solver
+    clock = SimulatedClock()
+    engine = MathEngine(rng=random.Random(seed), clock=clock, wall_clock=clock)
+    engine.spaced_repetition = spaced_repetition
+    for _ in range(problems):
+        problem = engine.next_problem(operation)
+        answer, latency_ns = solver.respond(problem)
+        clock.advance(latency_ns)
+        engine.submit(answer)
+    return engine, solver
+
+def report(engine, solver, operation, elapsed):
+    """Print throughput, how often weak facts came up and the per-factor statistics"""
+    stats = engine.stats
+    problems = stats.correct_count + stats.wrong_count
+    print(f"{problems} {operation} problems in {elapsed:.2f} s ({problems / elapsed:,.0f} problems/s)")
+    print(f"Accuracy {stats.correct_count / problems * 100:.1f}%, {len(engine.reviews[operation])} review cards")
+    
+    # Selection should favour the facts the solver finds hard
+    index = engine.fact_index[operation]
+    asked = [index.correct[i] + index.wrong[i] for i in range(len(index.facts))]
+    weak = [solver.is_weak((operation,) + fact) for fact in index.facts]
+    weak_asked = sum(n for n, w in zip(asked, weak) if w)
+    print(f"Weak facts: {sum(weak) / len(weak) * 100:.1f}% of facts, {weak_asked / problems * 100:.1f}% of problems")
+    
+    for factor in stats.factors[operation]:
+        median, p90 = stats.timing(operation, factor)
+        median = "-" if median is None else f"{median:.1f}/{p90:.1f} s"
+        print(f"  {OPERATION_SYMBOLS[operation]}{factor}: {stats.percentage(operation, factor):3d}% correct, median/p90 {median}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive the math engine with a simulated solver")
+    parser.add_argument("--problems", type=int, default=200000)
+    parser.add_argument("--operation", choices=["division", "multiplication"], default="division")
+    parser.add_argument("--accuracy", type=float, default=0.9, help="chance of a correct answer")
+    parser.add_argument("--latency", type=float, default=2.0, help="median response time (s)")
+    parser.add_argument("--spread", type=float, default=0.4, help="log-normal sigma of response times")
+    parser.add_argument("--weak-share", type=float, default=0.1, help="share of facts the solver finds hard")
+    parser.add_argument("--weak-accuracy", type=float, default=0.5, help="chance of a correct answer on a hard fact")
+    parser.add_argument("--no-reviews", action="store_true", help="weighted draws only, no spaced repetition")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    
+    solver = SimulatedSolver(args.accuracy, args.latency, args.spread, args.weak_share, args.weak_accuracy, args.seed)
+    start = time.perf_counter()
+    engine, solver = simulate(args.problems, args.operation, solver, not args.no_reviews, args.seed)
+    report(engine, solver, args.operation, time.perf_counter() - start)
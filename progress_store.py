@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import time
+from background_writer import BackgroundWriter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    answered_at INTEGER NOT NULL,  -- time.time_ns()
+    operation TEXT NOT NULL,
+    num1 INTEGER NOT NULL,
+    num2 INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    latency_ns INTEGER            -- NULL when not timed
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    through INTEGER NOT NULL,      -- Last answer id the state includes
+    created_at INTEGER NOT NULL,
+    state TEXT NOT NULL            -- JSON
+);
+"""
+
+class ProgressStore:
+    """Answer log with periodic aggregate snapshots in SQLite, committed in batches by a background thread"""
+    def __init__(self, path, batch=32, interval=1.0):
+        self.path = path
+        
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+        
+        # Opened on the writer thread, SQLite connections stay on the thread that made them
+        self.connection = None
+        self.writer = BackgroundWriter(self._write, 'progress-store', batch, interval, finish=self._finish)
+    
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+    
+    def load(self):
+        """Latest snapshot state (or None) and the answers logged after it, oldest first
+        
+        Answers come back as (operation, num1, num2, correct, latency_ns, answered_at).
+        """
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT through, state FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+            through, state = (0, None) if row is None else (row[0], json.loads(row[1]))
+            answers = connection.execute(
+                "SELECT operation, num1, num2, correct, latency_ns, answered_at FROM answers WHERE id > ? ORDER BY id",
+                (through,)).fetchall()
+        finally:
+            connection.close()
+        return state, [(operation, num1, num2, bool(correct), latency_ns, answered_at)
+                       for operation, num1, num2, correct, latency_ns, answered_at in answers]
+    
+    def record(self, operation, num1, num2, correct, latency_ns=None):
+        """Queue one answer; it is committed within `interval` s (1 s by default), all a killed process can lose"""
+        self.writer.put(('answer', (time.time_ns(), operation, num1, num2, int(correct), latency_ns)))
+    
+    def snapshot(self, state):
+        """Store the aggregate state as of every answer recorded so far, committed like an answer"""
+        self.writer.put(('snapshot', json.dumps(state)))
+    
+    def _write(self, items):
+        if self.connection is None:
+            self.connection = self._connect()
+        connection = self.connection
+        
+        # One transaction per batch, in queue order so a snapshot covers the answers before it
+        with connection:
+            for kind, value in items:
+                if kind == 'answer':
+                    connection.execute(
+                        "INSERT INTO answers (answered_at, operation, num1, num2, correct, latency_ns) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", value)
+                else:
+                    through = connection.execute("SELECT COALESCE(MAX(id), 0) FROM answers").fetchone()[0]
+                    connection.execute("INSERT INTO snapshots (through, created_at, state) VALUES (?, ?, ?)",
+                                       (through, time.time_ns(), value))
+                    # Older snapshots are never read again
+                    connection.execute("DELETE FROM snapshots WHERE id < (SELECT MAX(id) FROM snapshots)")
+    
+    def _finish(self):
+        if self.connection is not None:
+            self.connection.close()
+    
+    def flush(self):
+        """Wait until every answer and snapshot queued so far is committed"""
+        self.writer.flush()
+    
+    def close(self):
+        """Commit everything still queued and stop the writer thread"""
+        self.writer.close()
@@ -1,10 +1,19 @@
 from tkinter import Tk, Label, Entry, Button, Frame, Toplevel
-from SimConnect import SimConnect, AircraftRequests
+from flight_recorder import FlightRecorder
+from telemetry import TelemetryPoller, CONNECTED, LOST, connect_simconnect
+from tk_scheduler import TkScheduler
+from tkprofile import TkProfiler
+import argparse
 import random
+import sys
+import time
 
-# init simconnect & aircraft requests
-sm = SimConnect()
-requests = AircraftRequests(sm)
+# nothing touches tk or the simulator until main() runs; the ui and the poller are built there
+root = None
+scheduler = None  # phase events (problems, digits, images, label clears, phase end); reset drops them all
+poller = None
+recorder = None
+refresh_ms = 500
 
 # phase duration in ms
 phase_duration = 60000
@@ -32,29 +41,42 @@ btn_active = "#444444"
 base_font = ("segoe ui", 14)
 title_font = ("segoe ui", 16, "bold")
 
-# flight data update (runs every 500ms)
-def update_flight_data():
-    try:
-        alt = requests.get("PLANE_ALTITUDE")
-        vario = requests.get("VERTICAL_SPEED")
-        rpm = requests.get("GENERAL_ENG_RPM:1")
-    except Exception:
-        alt = vario = rpm = 0
+# msfs link indicator colour per poller state
+link_colors = {"connecting": "orange", "connected": "lime", "lost": "red"}
+
+# flag an overlay event in the flight recording (if one is being made)
+def mark(event):
+    if recorder is not None:
+        recorder.mark(event)
+
+# flight regime & recommended engine / knob settings for a vertical speed
+def flight_regime(vario):
     if vario < -50:
-        regime = "descente"
-        rec_engine = "700 rpm"
-        rec_knob = "54"
-    elif vario > 50:
-        regime = "montée"
-        rec_engine = "PLEIN GAZ"
-        rec_knob = "98"
-    else:
-        regime = "palier"
-        rec_engine = "1200 rpm"
-        rec_knob = "nn"
+        return "descente", "700 rpm", "54"
+    if vario > 50:
+        return "montée", "PLEIN GAZ", "98"
+    return "palier", "1200 rpm", "nn"
+
+# flight data display (runs every refresh_ms), reads the poller's latest sample and never waits on msfs
+def update_flight_data():
+    state = poller.state
+    if link_label.cget("text") != f"● {state}":
+        link_label.config(text=f"● {state}", fg=link_colors[state])
+    if state != CONNECTED:
+        # no session yet (or it dropped): say when the next attempt is instead of showing stale zeros
+        wait = "" if poller.retry_at is None else f" ({max(poller.retry_at - time.monotonic(), 0):.0f}s)"
+        fd_text = ("liaison msfs perdue, reconnexion" if state == LOST else "connexion à msfs") + f"...{wait}"
+        if fd_text != flight_label.cget("text"):
+            flight_label.config(text=fd_text)
+        root.after(refresh_ms, update_flight_data)
+        return
+    sample = poller.latest
+    alt, vario, rpm = sample.altitude, sample.vertical_speed, sample.rpm
+    regime, rec_engine, rec_knob = flight_regime(vario)
     fd_text = f"alt: {alt:.1f} | var: {vario:.1f} | rpm: {rpm:.0f}\nregime: {regime} | rec engine: {rec_engine} | rec knob: {rec_knob}"
-    flight_label.config(text=fd_text)
-    root.after(500, update_flight_data)
+    if fd_text != flight_label.cget("text"):
+        flight_label.config(text=fd_text)
+    root.after(refresh_ms, update_flight_data)
 
 # mental arithmetic task: new problem every 30 sec
 def new_arithmetic_problem():
@@ -78,13 +100,15 @@ def new_arithmetic_problem():
         current_arithmetic_answer = a // b
     arithmetic_label.config(text=problem)
     arithmetic_entry.delete(0, "end")
-    root.after(30000, new_arithmetic_problem)
+    mark("arithmetic")
+    scheduler.schedule(30000, new_arithmetic_problem)
 
 def check_arithmetic(event):
     global arithmetic_attempts, arithmetic_correct
     try:
         ans = int(arithmetic_entry.get())
         arithmetic_attempts += 1
+        mark("answer")
         if ans == current_arithmetic_answer:
             arithmetic_correct += 1
             arithmetic_feedback.config(text="correct", fg="lime")
@@ -92,7 +116,7 @@ def check_arithmetic(event):
             arithmetic_feedback.config(text="wrong", fg="red")
     except Exception:
         arithmetic_feedback.config(text="invalid", fg="red")
-    root.after(2000, lambda: arithmetic_feedback.config(text=""))
+    scheduler.clear_later(arithmetic_feedback, 2000, text="")
 
 # digit sequence task: generate a 4-5 digit sequence at phase start & schedule displays
 def start_digit_sequence():
@@ -101,12 +125,13 @@ def start_digit_sequence():
     digit_sequence = [str(random.randint(0, 9)) for _ in range(length)]
     delay = 5000  # start after 5 sec
     for d in digit_sequence:
-        root.after(delay, lambda digit=d: show_digit(digit))
+        scheduler.schedule(delay, show_digit, d)
         delay += random.randint(5000, 15000)
 
 def show_digit(d):
     digit_label.config(text=d)
-    root.after(1000, lambda: digit_label.config(text=""))
+    mark("digit")
+    scheduler.clear_later(digit_label, 1000, text="")
 
 # image counting task: schedule 10 random image events; count only target images
 def start_image_counting():
@@ -115,7 +140,7 @@ def start_image_counting():
     target_image_label.config(text="target", bg=accent_color, fg="white")
     for _ in range(10):
         delay = random.randint(5000, phase_duration - 5000)
-        root.after(delay, show_random_image)
+        scheduler.schedule(delay, show_random_image)
 
 def show_random_image():
     global target_count
@@ -124,12 +149,14 @@ def show_random_image():
     if is_target:
         target_count += 1
     image_popup.config(text=img_text, bg=accent_color if is_target else "#555555", fg="white")
-    root.after(500, lambda: image_popup.config(text=""))
+    mark("image")
+    scheduler.clear_later(image_popup, 500, text="")
 
 # phase end: enable user inputs for digit seq & image count answers + show finish button
 def end_phase():
     global phase_active
     phase_active = False
+    mark("phase_end")
     phase_status.config(text="phase ended. enter digit seq & image count.")
     digit_entry_frame.pack(pady=5)
     image_entry_frame.pack(pady=5)
@@ -191,7 +218,11 @@ def reset_game():
     global digit_sequence, target_count, digit_seq_result, digit_seq_expected
     global image_count_result, image_count_expected
 
+    # drop every event of the old phase (problem chain, digits, images, clears, end_phase)
+    scheduler.reset()
+
     phase_active = True
+    mark("reset")
     current_arithmetic_answer = None
     arithmetic_attempts = 0
     arithmetic_correct = 0
@@ -222,84 +253,145 @@ def reset_game():
     image_entry_frame.pack_forget()
     finish_button.pack_forget()
 
+    start_phase()
+
+# phase start: first problem now, digits & images over the phase, end after phase_duration
+def start_phase():
     new_arithmetic_problem()
     start_digit_sequence()
     start_image_counting()
-    root.after(phase_duration, end_phase)
-
-# setup tkinter ui with enhanced styling for a natural msfs overlay
-root = Tk()
-root.geometry("600x400+100+100")
-root.title("msfs overlay")
-root.attributes("-topmost", True)
-root.overrideredirect(True)
-root.attributes("-alpha", 0.85)
-root.config(bg=bg_color)
-
-# flight data frame
-flight_frame = Frame(root, bg=bg_color)
-flight_frame.pack(fill="x", pady=5)
-flight_label = Label(flight_frame, text="connexion à msfs...", font=title_font, bg=bg_color, fg="white")
-flight_label.pack()
-
-# arithmetic frame
-arithmetic_frame = Frame(root, bg=bg_color)
-arithmetic_frame.pack(fill="x", pady=5)
-arithmetic_label = Label(arithmetic_frame, text="", font=base_font, bg=bg_color, fg=accent_color)
-arithmetic_label.pack(side="left", padx=5)
-arithmetic_entry = Entry(arithmetic_frame, font=base_font, bg=btn_bg, fg="white", insertbackground="white")
-arithmetic_entry.pack(side="left", padx=5)
-arithmetic_feedback = Label(arithmetic_frame, text="", font=base_font, bg=bg_color, fg="white")
-arithmetic_feedback.pack(side="left", padx=5)
-arithmetic_entry.bind("<return>", check_arithmetic)
-
-# digit sequence display frame
-digit_frame = Frame(root, bg=bg_color)
-digit_frame.pack(fill="x", pady=5)
-digit_label = Label(digit_frame, text="", font=title_font, bg=bg_color, fg="cyan")
-digit_label.pack()
-
-# hidden digit answer entry frame (shown at phase end)
-digit_entry_frame = Frame(root, bg=bg_color)
-digit_entry = Entry(digit_entry_frame, font=title_font, bg=btn_bg, fg="white", insertbackground="white")
-digit_entry.pack(side="left", padx=5)
-Button(digit_entry_frame, text="check digit seq", font=base_font, bg=btn_bg, fg="white", relief="flat",
-       command=check_digit_sequence).pack(side="left", padx=5)
-digit_result = Label(digit_entry_frame, text="", font=base_font, bg=bg_color, fg="white")
-digit_result.pack(side="left", padx=5)
-
-# image counting frame
-image_frame = Frame(root, bg=bg_color)
-image_frame.pack(fill="x", pady=5)
-target_image_label = Label(image_frame, text="", font=base_font, bg=bg_color, fg="white")
-target_image_label.pack(side="left", padx=5)
-image_popup = Label(image_frame, text="", font=base_font, bg=bg_color, fg="white")
-image_popup.pack(side="left", padx=5)
-
-# hidden image answer entry frame (shown at phase end)
-image_entry_frame = Frame(root, bg=bg_color)
-image_entry = Entry(image_entry_frame, font=title_font, bg=btn_bg, fg="white", insertbackground="white")
-image_entry.pack(side="left", padx=5)
-Button(image_entry_frame, text="check image count", font=base_font, bg=btn_bg, fg="white", relief="flat",
-       command=check_image_count).pack(side="left", padx=5)
-image_result = Label(image_entry_frame, text="", font=base_font, bg=bg_color, fg="white")
-image_result.pack(side="left", padx=5)
-
-# phase status label
-phase_status = Label(root, text="phase in progress...", font=title_font, bg=bg_color, fg="white")
-phase_status.pack(pady=5)
-
-# finish button (hidden until phase end)
-finish_button = Button(root, text="finish game", font=base_font, bg=btn_bg, fg="white", relief="flat", command=show_final_results)
-
-# reset button (always available)
-reset_button = Button(root, text="reset game", font=base_font, bg=btn_bg, fg="white", relief="flat", command=reset_game)
-reset_button.pack(pady=5)
-
-root.after(0, update_flight_data)
-root.after(0, new_arithmetic_problem)
-start_digit_sequence()
-start_image_counting()
-root.after(phase_duration, end_phase)
-
-root.mainloop()
+    scheduler.schedule(phase_duration, end_phase)
+
+def build_ui():
+    """create the overlay window and its widgets"""
+    global root, link_label, flight_label, arithmetic_label, arithmetic_entry, arithmetic_feedback
+    global digit_label, digit_entry_frame, digit_entry, digit_result
+    global target_image_label, image_popup, image_entry_frame, image_entry, image_result
+    global phase_status, finish_button
+
+    # setup tkinter ui with enhanced styling for a natural msfs overlay
+    root = Tk()
+    root.geometry("600x400+100+100")
+    root.title("msfs overlay")
+    root.attributes("-topmost", True)
+    root.overrideredirect(True)
+    root.attributes("-alpha", 0.85)
+    root.config(bg=bg_color)
+
+    # flight data frame
+    flight_frame = Frame(root, bg=bg_color)
+    flight_frame.pack(fill="x", pady=5)
+    link_label = Label(flight_frame, text="● connecting", font=base_font, bg=bg_color, fg=link_colors["connecting"])
+    link_label.pack(anchor="e", padx=5)
+    flight_label = Label(flight_frame, text="connexion à msfs...", font=title_font, bg=bg_color, fg="white")
+    flight_label.pack()
+
+    # arithmetic frame
+    arithmetic_frame = Frame(root, bg=bg_color)
+    arithmetic_frame.pack(fill="x", pady=5)
+    arithmetic_label = Label(arithmetic_frame, text="", font=base_font, bg=bg_color, fg=accent_color)
+    arithmetic_label.pack(side="left", padx=5)
+    arithmetic_entry = Entry(arithmetic_frame, font=base_font, bg=btn_bg, fg="white", insertbackground="white")
+    arithmetic_entry.pack(side="left", padx=5)
+    arithmetic_feedback = Label(arithmetic_frame, text="", font=base_font, bg=bg_color, fg="white")
+    arithmetic_feedback.pack(side="left", padx=5)
+    arithmetic_entry.bind("<return>", check_arithmetic)
+
+    # digit sequence display frame
+    digit_frame = Frame(root, bg=bg_color)
+    digit_frame.pack(fill="x", pady=5)
+    digit_label = Label(digit_frame, text="", font=title_font, bg=bg_color, fg="cyan")
+    digit_label.pack()
+
+    # hidden digit answer entry frame (shown at phase end)
+    digit_entry_frame = Frame(root, bg=bg_color)
+    digit_entry = Entry(digit_entry_frame, font=title_font, bg=btn_bg, fg="white", insertbackground="white")
+    digit_entry.pack(side="left", padx=5)
+    Button(digit_entry_frame, text="check digit seq", font=base_font, bg=btn_bg, fg="white", relief="flat",
+           command=check_digit_sequence).pack(side="left", padx=5)
+    digit_result = Label(digit_entry_frame, text="", font=base_font, bg=bg_color, fg="white")
+    digit_result.pack(side="left", padx=5)
+
+    # image counting frame
+    image_frame = Frame(root, bg=bg_color)
+    image_frame.pack(fill="x", pady=5)
+    target_image_label = Label(image_frame, text="", font=base_font, bg=bg_color, fg="white")
+    target_image_label.pack(side="left", padx=5)
+    image_popup = Label(image_frame, text="", font=base_font, bg=bg_color, fg="white")
+    image_popup.pack(side="left", padx=5)
+
+    # hidden image answer entry frame (shown at phase end)
+    image_entry_frame = Frame(root, bg=bg_color)
+    image_entry = Entry(image_entry_frame, font=title_font, bg=btn_bg, fg="white", insertbackground="white")
+    image_entry.pack(side="left", padx=5)
+    Button(image_entry_frame, text="check image count", font=base_font, bg=btn_bg, fg="white", relief="flat",
+           command=check_image_count).pack(side="left", padx=5)
+    image_result = Label(image_entry_frame, text="", font=base_font, bg=bg_color, fg="white")
+    image_result.pack(side="left", padx=5)
+
+    # phase status label
+    phase_status = Label(root, text="phase in progress...", font=title_font, bg=bg_color, fg="white")
+    phase_status.pack(pady=5)
+
+    # finish button (hidden until phase end)
+    finish_button = Button(root, text="finish game", font=base_font, bg=btn_bg, fg="white", relief="flat", command=show_final_results)
+
+    # reset button (always available)
+    reset_button = Button(root, text="reset game", font=base_font, bg=btn_bg, fg="white", relief="flat", command=reset_game)
+    reset_button.pack(pady=5)
+
+def main():
+    global scheduler, poller, recorder, refresh_ms
+    parser = argparse.ArgumentParser(description="msfs training overlay")
+    parser.add_argument("--profile", metavar="TRACE", help="time tk callbacks and write a chrome trace here on exit")
+    parser.add_argument("--sample-rate", type=float, default=4.0, help="telemetry samples per second")
+    parser.add_argument("--refresh", type=int, default=500, help="flight data display refresh (ms)")
+    parser.add_argument("--record", metavar="FLIGHT", help="record telemetry and overlay events to this file")
+    parser.add_argument("--record-rate", type=float, default=20.0, help="telemetry samples per second while recording")
+    parser.add_argument("--fake-sim", nargs="?", const="synthetic", metavar="TRACK",
+                        help="play a recorded csv track (or the synthetic circuit) instead of connecting to msfs")
+    parser.add_argument("--fake-speed", type=float, default=1.0, help="fake sim: simulated seconds per second")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="fake sim: request latency (s)")
+    parser.add_argument("--fake-dropout", type=float, default=0.0, help="fake sim: chance a request comes back empty")
+    args = parser.parse_args()
+    refresh_ms = args.refresh
+
+    # --profile times every tk callback (started before any widget exists)
+    profiler = TkProfiler().start() if args.profile else None
+
+    # window first; the poller connects to msfs on its own thread, retrying with backoff until it is up
+    build_ui()
+    scheduler = TkScheduler(root, profiler=profiler)
+    connect = connect_simconnect
+    if args.fake_sim is not None:
+        import fake_simconnect
+        track = None if args.fake_sim == "synthetic" else fake_simconnect.load_track(args.fake_sim)
+        connect = fake_simconnect.connector(track=track, speed=args.fake_speed, latency=args.fake_latency,
+                                            dropout=args.fake_dropout)
+    # recording samples every poll, so the poller runs at least at the recording rate
+    rate = args.sample_rate if args.record is None else max(args.sample_rate, args.record_rate)
+    poller = TelemetryPoller(connect, rate=rate)
+    if args.record is not None:
+        recorder = FlightRecorder(args.record, rate)
+        poller.listeners.append(recorder.append)
+    poller.start()
+
+    # flight data refresh is not part of a phase, it keeps its own timer
+    root.after(0, update_flight_data)
+    scheduler.schedule(0, start_phase)
+
+    try:
+        root.mainloop()
+    finally:
+        poller.stop()
+        if recorder is not None:
+            recorder.close()
+        if profiler is not None:
+            profiler.finish(args.profile)
+            drift = scheduler.drift_stats()
+            if drift is not None:
+                print(f"phase events: {scheduler.fired} fired, lateness p50 {drift[0]:.1f} ms, "
+                      f"p99 {drift[1]:.1f} ms, max {drift[2]:.1f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from collections import namedtuple
+
+# Snapshot field -> SimConnect simulation variable
+TELEMETRY_VARS = (
+    ('altitude', 'PLANE_ALTITUDE'),
+    ('vertical_speed', 'VERTICAL_SPEED'),
+    ('rpm', 'GENERAL_ENG_RPM:1'),
+)
+
+# One immutable sample; ok is False when the simulator did not answer
+Telemetry = namedtuple('Telemetry', [field for field, _ in TELEMETRY_VARS] + ['sampled_ns', 'ok'])
+
+NO_TELEMETRY = Telemetry(*(0.0 for _ in TELEMETRY_VARS), 0, False)
+
+# Link states, in the order a session normally goes through them
+CONNECTING, CONNECTED, LOST = 'connecting', 'connected', 'lost'
+
+def connect_simconnect():
+    """Open a SimConnect session, returns (requests, close); raises if the simulator is not up"""
+    # Imported here so the overlay starts, and this module imports, without the simulator or library
+    from SimConnect import SimConnect, AircraftRequests
+    sm = SimConnect()
+    return AircraftRequests(sm), sm.exit
+
+class TelemetryPoller:
+    """Connects in the background, polls the simulation variables on a worker thread and publishes the latest sample"""
+    def __init__(self, connect=connect_simconnect, rate=4.0, initial_backoff=1.0, max_backoff=30.0, max_failures=5):
+        self.connect = connect
+        self.rate = rate  # Samples per second, independent of how often the UI reads them
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_failures = max_failures  # Failed samples in a row before the link counts as lost
+        self.samples = 0
+        self.failures = 0
+        self.connections = 0
+        
+        self.requests = None
+        self.close = None
+        
+        # Replaced as a whole, never mutated, so readers never need a lock
+        self.latest = NO_TELEMETRY
+        self.state = CONNECTING
+        self.retry_at = None  # time.monotonic() of the next connection attempt while waiting
+        
+        # Called with every sample on the poller thread, must not block
+        self.listeners = []
+        
+        self.stopped = threading.Event()
+        self.thread = None
+    
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self.thread.start()
+        return self
+    
+    def poll(self):
+        """Read every variable in one pass and build a sample"""
+        try:
+            values = [self.requests.get(name) for _, name in TELEMETRY_VARS]
+        except Exception:
+            return NO_TELEMETRY._replace(sampled_ns=time.monotonic_ns())
+        ok = all(value is not None for value in values)
+        return Telemetry(*(float(value or 0.0) for value in values), time.monotonic_ns(), ok)
+    
+    def _connect(self):
+        """Try to connect until it works or the poller stops, backing off exponentially with jitter"""
+        backoff = self.initial_backoff
+        while not self.stopped.is_set():
+            try:
+                self.requests, self.close = self.connect()
+                self.connections += 1
+                self.retry_at = None
+                self.state = CONNECTED
+                return True
+            except Exception:
+                delay = backoff * random.uniform(0.8, 1.2)
+                self.retry_at = time.monotonic() + delay
+                self.stopped.wait(delay)
+                backoff = min(backoff * 2, self.max_backoff)
+        return False
+    
+    def _disconnect(self):
+        if self.close is not None:
+            try:
+                self.close()
+            except Exception:
+                pass
+        self.requests = self.close = None
+    
+    def _run(self):
+        # Fixed schedule, a slow answer delays the next sample but the rate does not drift
+        period_ns = int(1e9 / self.rate)
+        failed_in_row = 0
+        while self._connect():
+            next_ns = time.monotonic_ns()
+            while not self.stopped.is_set():
+                sample = self.poll()
+                self.latest = sample
+                for listener in self.listeners:
+                    listener(sample)
+                self.samples += 1
+                self.failures += not sample.ok
+                failed_in_row = 0 if sample.ok else failed_in_row + 1
+                if failed_in_row >= self.max_failures:
+                    break
+                
+                next_ns += period_ns
+                now_ns = time.monotonic_ns()
+                if next_ns < now_ns:
+                    next_ns = now_ns  # Fell behind, skip the missed samples instead of bursting
+                self.stopped.wait((next_ns - now_ns) / 1e9)
+            
+            # Lost the simulator (or stopping): drop the session and start over
+            self._disconnect()
+            failed_in_row = 0
+            if not self.stopped.is_set():
+                self.state = LOST
+        self._disconnect()
+    
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
@@ -0,0 +1,108 @@
+import collections
+import heapq
+import itertools
+import sys
+import time
+
+class Event:
+    """Handle of one scheduled callback, cancel() drops it without touching the heap"""
+    __slots__ = ('due_ns', 'func', 'args', 'generation', 'cancelled')
+    
+    def __init__(self, due_ns, func, args, generation):
+        self.due_ns = due_ns
+        self.func = func
+        self.args = args
+        self.generation = generation
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+
+class TkScheduler:
+    """Heap of cancellable callbacks driven by a single Tk timer; reset() drops every pending one at once"""
+    def __init__(self, root, drift_window=1000, profiler=None):
+        self.root = root
+        self.profiler = profiler       # tkprofile.TkProfiler, gets one span per event instead of one per timer
+        self.heap = []                 # (due_ns, seq, event)
+        self.seq = itertools.count()   # Keeps same-time events in scheduling order
+        self.generation = 0
+        self.timer = None              # Tk after id of the one pending timer
+        self.timer_due_ns = None
+        self.clears = {}               # widget -> pending coalesced clear
+        self.drift = collections.deque(maxlen=drift_window)  # Recent lateness (ns) of fired events
+        self.fired = 0
+    
+    def schedule(self, delay_ms, func, *args):
+        """Run func(*args) after delay_ms, returns an Event that can be cancelled"""
+        event = Event(time.monotonic_ns() + int(delay_ms * 1_000_000), func, args, self.generation)
+        heapq.heappush(self.heap, (event.due_ns, next(self.seq), event))
+        if self.timer_due_ns is None or event.due_ns < self.timer_due_ns:
+            self._arm(event.due_ns)
+        return event
+    
+    def clear_later(self, widget, delay_ms, **config):
+        """Configure widget after delay_ms, replacing any clear still pending for it so only the last one runs"""
+        pending = self.clears.get(widget)
+        if pending is not None:
+            pending.cancel()
+        self.clears[widget] = self.schedule(delay_ms, self._clear, widget, config)
+    
+    def _clear(self, widget, config):
+        del self.clears[widget]
+        widget.config(**config)
+    
+    def reset(self):
+        """Forget every pending callback in O(1): new heap, new generation, timer cancelled"""
+        self.generation += 1
+        self.heap = []
+        self.clears = {}
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = self.timer_due_ns = None
+    
+    def _arm(self, due_ns):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+        self.timer_due_ns = due_ns
+        delay_ms = max(0, -(-(due_ns - time.monotonic_ns()) // 1_000_000))  # Round up, Tk never fires early then
+        self.timer = self.root.after(delay_ms, self._fire)
+    
+    def _fire(self):
+        self.timer = self.timer_due_ns = None
+        try:
+            now_ns = time.monotonic_ns()
+            heap = self.heap
+            while heap and heap[0][0] <= now_ns:
+                _, _, event = heapq.heappop(heap)
+                if event.cancelled or event.generation != self.generation:
+                    continue
+                self.drift.append(now_ns - event.due_ns)
+                self.fired += 1
+                self._run(event, now_ns - event.due_ns)
+                if heap is not self.heap:
+                    break  # The callback reset the scheduler, the old heap is gone
+        finally:
+            # Skip cancelled heads so the timer is armed for something that will run
+            while self.heap and self.heap[0][2].cancelled:
+                heapq.heappop(self.heap)
+            if self.heap and (self.timer_due_ns is None or self.heap[0][0] < self.timer_due_ns):
+                self._arm(self.heap[0][0])
+    
+    def _run(self, event, late_ns):
+        # A failing callback is reported like any Tk callback and does not stop the events after it
+        start = time.perf_counter_ns()
+        try:
+            event.func(*event.args)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            if self.profiler is not None:
+                self.profiler.record(event.func, 'scheduled', start, time.perf_counter_ns() - start, late_ns)
+    
+    def drift_stats(self):
+        """Lateness of recent events in ms: (p50, p99, max), or None before the first one fired"""
+        if not self.drift:
+            return None
+        ordered = sorted(self.drift)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1e6
+        return pick(0.5), pick(0.99), ordered[-1] / 1e6
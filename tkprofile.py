@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+import threading
+import time
+import tkinter
+
+PERCENTILES = (50, 90, 99)
+
+def callback_name(func):
+    """Readable name of a callback: qualified name plus where it is defined"""
+    code = getattr(getattr(func, '__func__', func), '__code__', None)
+    name = getattr(func, '__qualname__', None) or repr(func)
+    if code is None:
+        return name
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def percentiles(values, q=PERCENTILES):
+    """Nearest-rank percentiles of a list of numbers"""
+    ordered = sorted(values)
+    return [ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))] for p in q]
+
+class TkProfiler:
+    """Times every Tk callback and the lateness of after() timers while started, nothing is patched otherwise"""
+    def __init__(self):
+        self.spans = []   # (name, kind, start_ns, duration_ns, thread id)
+        self.jitter = {}  # after() callback name -> lateness (ns) of each run
+        self.patched = None
+    
+    def start(self):
+        """Patch tkinter so callbacks registered from now on are timed"""
+        if self.patched is not None:
+            return self
+        profiler = self
+        original_after = tkinter.Misc.after
+        original_wrapper = tkinter.CallWrapper
+        
+        # after_idle goes through after('idle', ...)
+        def after(widget, ms, func=None, *args):
+            if func is None:
+                return original_after(widget, ms)
+            if ms == 'idle':
+                return original_after(widget, ms, profiler.timer(func, 0, 'idle'), *args)
+            return original_after(widget, ms, profiler.timer(func, ms), *args)
+        
+        class TimedCallWrapper(original_wrapper):
+            def __call__(self, *args):
+                # Timers are timed by their own wrapper, this only sees the inner dispatch
+                if getattr(self.func, '__qualname__', '').endswith('after.<locals>.callit'):
+                    return original_wrapper.__call__(self, *args)
+                start = time.perf_counter_ns()
+                try:
+                    return original_wrapper.__call__(self, *args)
+                finally:
+                    profiler.spans.append((callback_name(self.func), 'event', start,
+                                           time.perf_counter_ns() - start, threading.get_ident()))
+        
+        tkinter.Misc.after = after
+        tkinter.CallWrapper = TimedCallWrapper
+        self.patched = (original_after, original_wrapper)
+        return self
+    
+    def stop(self):
+        """Undo the patches, already recorded spans are kept"""
+        if self.patched is not None:
+            tkinter.Misc.after, tkinter.CallWrapper = self.patched
+            self.patched = None
+    
+    def timer(self, func, ms, kind='after'):
+        """Wrap an after() callback to record how late it ran and how long it took"""
+        name = callback_name(func)
+        due_ns = time.perf_counter_ns() + ms * 1_000_000
+        
+        def timed(*args):
+            start = time.perf_counter_ns()
+            self.jitter.setdefault(name, []).append(start - due_ns)
+            try:
+                return func(*args)
+            finally:
+                self.spans.append((name, kind, start, time.perf_counter_ns() - start, threading.get_ident()))
+        return timed
+    
+    def record(self, func, kind, start, duration, late_ns=None):
+        """Add a span for a callback dispatched outside tkinter's own timers, such as a scheduler's"""
+        name = callback_name(func)
+        if late_ns is not None:
+            self.jitter.setdefault(name, []).append(late_ns)
+        self.spans.append((name, kind, start, duration, threading.get_ident()))
+    
+    def summary(self):
+        """Per-callback count, duration percentiles and worst case (ms), plus timer lateness for after() callbacks"""
+        durations = {}
+        for name, _, _, duration, _ in self.spans:
+            durations.setdefault(name, []).append(duration / 1e6)
+        result = {}
+        for name, values in durations.items():
+            entry = {'count': len(values), 'max_ms': max(values)}
+            entry.update({f'p{q}_ms': v for q, v in zip(PERCENTILES, percentiles(values))})
+            if name in self.jitter:
+                lateness = [ns / 1e6 for ns in self.jitter[name]]
+                entry.update({f'jitter_p{q}_ms': v for q, v in zip(PERCENTILES, percentiles(lateness))})
+                entry['jitter_max_ms'] = max(lateness)
+            result[name] = entry
+        return result
+    
+    def export(self, path):
+        """Write a Chrome trace (chrome://tracing, Perfetto) with the summary under otherData"""
+        pid = os.getpid()
+        events = [{'name': name, 'cat': kind, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3,
+                   'pid': pid, 'tid': tid}
+                  for name, kind, start, duration, tid in self.spans]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': self.summary()}, f)
+    
+    def report(self, file=sys.stderr):
+        """Print the summary, slowest callbacks first"""
+        summary = sorted(self.summary().items(), key=lambda item: -item[1]['p99_ms'])
+        print(f"{'callback':<60} {'count':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'late p99':>9}", file=file)
+        for name, entry in summary:
+            late = f"{entry['jitter_p99_ms']:9.1f}" if 'jitter_p99_ms' in entry else f"{'-':>9}"
+            print(f"{name[:60]:<60} {entry['count']:7d} {entry['p50_ms']:8.2f} {entry['p90_ms']:8.2f} "
+                  f"{entry['p99_ms']:8.2f} {entry['max_ms']:8.2f} {late}", file=file)
+    
+    def finish(self, path):
+        """Stop, export the trace to path and print the summary"""
+        self.stop()
+        self.export(path)
+        print(f"Trace written to '{path}'", file=sys.stderr)
+        self.report()
@@ -0,0 +1,109 @@
+import glob
+import os
+import numpy as np
+from background_writer import BackgroundWriter
+
+MAGIC = b'EOPANTRL'
+VERSION = 1
+
+EARS = ('left', 'right')
+
+# One fixed-width little-endian record per presentation
+TRIAL_DTYPE = np.dtype([
+    ('session', '<u8'),     # time.time_ns() when the session started
+    ('trial', '<u4'),       # Presentation number within the session
+    ('ear', 'u1'),          # Index into EARS
+    ('heard', 'u1'),
+    ('frequency', '<u2'),   # Hz
+    ('level', '<f4'),       # dB
+    ('onset_ns', '<i8'),    # Tone onset, ns since the session started
+    ('latency_ns', '<i8'),  # Reaction latency, -1 when not heard
+])
+
+HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('record_size', '<u4')])
+
+class TrialLogWriter:
+    """Append presentations to a binary trial log from a background thread, each flushed to the OS within `interval` s"""
+    def __init__(self, path, session, batch=64, interval=1.0):
+        self.path = path
+        self.session = session
+        self.trials = 0
+        
+        # Header only for a new file, later sessions append records after the last whole one,
+        # so a record torn by a crash does not shift everything written after it
+        self.file = open(path, 'ab')
+        size = self.file.tell()
+        whole = size - (size - HEADER.itemsize) % TRIAL_DTYPE.itemsize if size >= HEADER.itemsize else 0
+        if whole != size:
+            self.file.truncate(whole)
+            self.file.seek(whole)
+        if whole == 0:
+            self.file.write(np.array([(MAGIC, VERSION, TRIAL_DTYPE.itemsize)], dtype=HEADER).tobytes())
+            self.file.flush()
+        
+        self.writer = BackgroundWriter(self._write, 'trial-log', batch, interval, finish=self.file.close)
+    
+    def append(self, ear, frequency, level, onset_ns, latency_ns):
+        """Queue one presentation; it is in the file within `interval` s, all a killed process can lose"""
+        self.writer.put((self.session, self.trials, EARS.index(ear), latency_ns is not None,
+                         frequency, level, onset_ns, -1 if latency_ns is None else latency_ns))
+        self.trials += 1
+    
+    def _write(self, records):
+        self.file.write(np.array(records, dtype=TRIAL_DTYPE).tobytes())
+        self.file.flush()
+    
+    def flush(self):
+        """Wait until every presentation appended so far is in the file"""
+        self.writer.flush()
+    
+    def close(self):
+        """Write everything still queued and close the file"""
+        self.writer.close()
+
+def open_log(path):
+    """Memory-map the records of one trial log, ignoring a partly written last record"""
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f"{path} is not a trial log")
+    if header['record_size'][0] != TRIAL_DTYPE.itemsize:
+        raise ValueError(f"{path} was written with an incompatible record layout")
+    
+    count = (os.path.getsize(path) - HEADER.itemsize) // TRIAL_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=TRIAL_DTYPE)
+    return np.memmap(path, dtype=TRIAL_DTYPE, mode='r', offset=HEADER.itemsize, shape=(count,))
+
+def load_trials(paths):
+    """Trials of every log matching a list of paths or a glob pattern, as one structured array"""
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths))
+    logs = [open_log(path) for path in paths]
+    return np.concatenate(logs) if logs else np.zeros(0, dtype=TRIAL_DTYPE)
+
+def summarize(trials):
+    """Print presentation counts, response rates and median reaction time per condition"""
+    sessions = np.unique(trials['session'])
+    print(f"{len(trials)} trials in {len(sessions)} sessions")
+    
+    # Group by (ear, frequency) in one pass over sorted keys
+    keys = trials['ear'].astype(np.uint32) << 16 | trials['frequency']
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    bounds = np.flatnonzero(np.diff(keys)) + 1
+    for group in np.split(order, bounds):
+        if len(group) == 0:
+            continue
+        first = trials[group[0]]
+        heard = trials['heard'][group].astype(bool)
+        latencies = trials['latency_ns'][group][heard]
+        median = f"{np.median(latencies) / 1e6:.0f} ms" if len(latencies) else "-"
+        print(f"  {EARS[first['ear']]:<5} {first['frequency']:>5} Hz: {len(group):7d} trials, "
+              f"{heard.mean() * 100:5.1f}% heard, median reaction {median}")
+
+if __name__ == "__main__":
+    import sys
+    
+    # Scan every log matching the given paths or patterns
+    patterns = sys.argv[1:] or ["hearing_trials.bin"]
+    summarize(load_trials(sorted(path for pattern in patterns for path in glob.glob(pattern))))
@@ -0,0 +1,204 @@
+import argparse
+import sys
+import time
+import numpy as np
+from math_engine import DIVISORS, FACTORS, QUOTIENTS
+
+OPERATIONS = ("addition", "subtraction", "multiplication", "division")
+SYMBOLS = {"addition": "+", "subtraction": "-", "multiplication": "×", "division": "÷"}
+
+# Operand ranges per operation: addends, minuend/subtrahend, factors, divisor/quotient
+DEFAULT_RANGES = {
+    "addition": (range(1, 101), range(1, 101)),
+    "subtraction": (range(1, 101), range(1, 101)),
+    "multiplication": (FACTORS, FACTORS),
+    "division": (DIVISORS, QUOTIENTS),
+}
+
+PROBLEM_DTYPE = np.dtype([('operation', 'u1'), ('num1', '<i8'), ('num2', '<i8'), ('answer', '<i8')])
+
+# Spaces up to this many pairs are enumerated, larger ones are sampled
+ENUMERATE_LIMIT = 4_000_000
+
+def combine(operation, first, second):
+    """Problems from operand arrays, as (num1, num2, answer)"""
+    if operation == "addition":
+        return first, second, first + second
+    if operation == "subtraction":
+        return first, second, first - second
+    if operation == "multiplication":
+        return first, second, first * second
+    # Division is built from divisor and quotient, so the result is always a natural number
+    return first * second, first, second
+
+def valid(num1, num2, answer, max_result=None, min_result=None, max_operand=None):
+    """Mask of the problems that meet the constraints"""
+    keep = np.ones(len(answer), dtype=bool)
+    if max_result is not None:
+        keep &= answer <= max_result
+    if min_result is not None:
+        keep &= answer >= min_result
+    if max_operand is not None:
+        keep &= (num1 <= max_operand) & (num2 <= max_operand)
+    return keep
+
+def second_bounds(operation, first, max_result=None, min_result=None, max_operand=None):
+    """Per first operand, the (low, high) second operands that meet the constraints; every result is monotonic in it"""
+    low, high = np.full(len(first), -np.inf), np.full(len(first), np.inf)
+    a = first.astype(float)
+    lo = -np.inf if min_result is None else min_result
+    hi = np.inf if max_result is None else max_result
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if operation == "addition":
+            low, high = lo - a, hi - a
+        elif operation == "subtraction":
+            low, high = a - hi, a - lo
+        elif operation == "multiplication":
+            low = np.where(a > 0, lo / a, np.where(a < 0, hi / a, np.where(lo <= 0, -np.inf, np.inf)))
+            high = np.where(a > 0, hi / a, np.where(a < 0, lo / a, np.where(hi >= 0, np.inf, -np.inf)))
+        else:
+            # The second operand is the answer here, and the shown dividend is first * second
+            low, high = np.maximum(low, lo), np.minimum(high, hi)
+            if max_operand is not None:
+                high = np.minimum(high, np.where(a > 0, max_operand / a, np.where(max_operand >= 0, np.inf, -np.inf)))
+                low = np.maximum(low, np.where(a < 0, max_operand / a, -np.inf))
+    if max_operand is not None:
+        if operation != "division":
+            high = np.minimum(high, max_operand)
+        high = np.where(first <= max_operand, high, -np.inf)
+    return low, high
+
+def generate_problems(operation, count, first=None, second=None, max_result=None, min_result=None,
+                      max_operand=None, rng=None):
+    """count distinct problems of one operation within the constraints, in random order"""
+    rng = np.random.default_rng() if rng is None else rng
+    default_first, default_second = DEFAULT_RANGES[operation]
+    first = np.arange(default_first.start, default_first.stop) if first is None else np.asarray(first)
+    second = np.arange(default_second.start, default_second.stop) if second is None else np.asarray(second)
+    if operation == "subtraction" and min_result is None:
+        min_result = 0  # No negative results unless asked for
+    constraints = dict(max_result=max_result, min_result=min_result, max_operand=max_operand)
+    
+    space = len(first) * len(second)
+    if space <= ENUMERATE_LIMIT:
+        # Small space: every valid pair, then an exact draw without replacement
+        pairs = np.arange(space)
+        num1, num2, answer = combine(operation, first[pairs // len(second)], second[pairs % len(second)])
+        pairs = pairs[valid(num1, num2, answer, **constraints)]
+        if len(pairs) < count:
+            raise ValueError(f"Only {len(pairs)} distinct {operation} problems meet the constraints")
+        pairs = rng.choice(pairs, count, replace=False)
+    else:
+        # Large space: the valid second operands of each first one are a run of the sorted seconds,
+        # so count them exactly and draw ranks into those runs
+        order = np.argsort(second, kind='stable')
+        ordered = second[order]
+        low, high = second_bounds(operation, first, **constraints)
+        starts = np.searchsorted(ordered, low, side='left')
+        counts = np.maximum(np.searchsorted(ordered, high, side='right') - starts, 0)
+        ends = np.cumsum(counts)
+        total = int(ends[-1]) if len(ends) else 0
+        if total < count:
+            raise ValueError(f"Only {total} distinct {operation} problems meet the constraints")
+        ranks = rng.choice(total, count, replace=False)
+        rows = np.searchsorted(ends, ranks, side='right')
+        pairs = rows * len(second) + order[starts[rows] + ranks - (ends[rows] - counts[rows])]
+    
+    problems = np.empty(count, dtype=PROBLEM_DTYPE)
+    problems['operation'] = OPERATIONS.index(operation)
+    problems['num1'], problems['num2'], problems['answer'] = combine(
+        operation, first[pairs // len(second)], second[pairs % len(second)])
+    return problems
+
+def generate_worksheet(count, operations=("division", "multiplication"), rng=None, **options):
+    """count problems split evenly over the operations and shuffled together"""
+    rng = np.random.default_rng() if rng is None else rng
+    shares = np.full(len(operations), count // len(operations))
+    shares[:count % len(operations)] += 1
+    problems = np.concatenate([generate_problems(operation, int(share), rng=rng, **options)
+                               for operation, share in zip(operations, shares)])
+    return problems[rng.permutation(len(problems))]
+
+def problem_lines(problems, answers=False, width=0):
+    """Each problem as 'num1 op num2 = ...', right-aligned to width"""
+    symbols = np.array([SYMBOLS[operation] for operation in OPERATIONS])[problems['operation']]
+    left = np.char.add(np.char.add(problems['num1'].astype(str), np.char.add(" ", symbols)),
+                       np.char.add(" ", problems['num2'].astype(str)))
+    right = problems['answer'].astype(str) if answers else np.full(len(problems), "_____")
+    return np.char.rjust(np.char.add(left, np.char.add(" = ", right)), width)
+
+def write_csv(problems, file, chunk=50000):
+    """Stream problems as CSV rows of num1, operation, num2, answer"""
+    file.write("num1,operation,num2,answer\n")
+    for start in range(0, len(problems), chunk):
+        block = problems[start:start + chunk]
+        operations = np.array(OPERATIONS)[block['operation']]
+        rows = np.char.add(np.char.add(block['num1'].astype(str), ","), operations)
+        rows = np.char.add(np.char.add(rows, ","), block['num2'].astype(str))
+        rows = np.char.add(np.char.add(rows, ","), block['answer'].astype(str))
+        file.write("\n".join(rows.tolist()) + "\n")
+
+def write_sheet(problems, file, columns=4, rows=25, answers=True, title="Worksheet"):
+    """Stream a printable text layout: numbered pages of problems, then an answer key, pages split by form feeds"""
+    per_page = columns * rows
+    pages = max(1, -(-len(problems) // per_page))
+    width = int(np.char.str_len(problem_lines(problems, True)).max()) + 2 if len(problems) else 0
+    
+    def write_pages(lines, heading):
+        for page in range(pages):
+            block = lines[page * per_page:(page + 1) * per_page]
+            numbers = np.char.rjust((np.arange(len(block)) + page * per_page + 1).astype(str), 6)
+            cells = np.char.add(np.char.add(numbers, ") "), block)
+            file.write(f"{heading} - page {page + 1}/{pages}\n\n")
+            # Fill down each column, then across
+            for row in range(rows):
+                line = "".join(cells[row::rows].tolist()).rstrip()
+                if line:
+                    file.write(line + "\n")
+            file.write("\f")
+    
+    write_pages(problem_lines(problems, False, width), title)
+    if answers:
+        write_pages(problem_lines(problems, True, width), f"{title} - answers")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a drill worksheet")
+    parser.add_argument("--count", type=int, default=100, help="number of problems")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=["division", "multiplication"])
+    parser.add_argument("--first", type=int, nargs=2, metavar=("MIN", "MAX"),
+                        help="first operand range (divisor for division), inclusive")
+    parser.add_argument("--second", type=int, nargs=2, metavar=("MIN", "MAX"),
+                        help="second operand range (quotient for division), inclusive")
+    parser.add_argument("--max-result", type=int)
+    parser.add_argument("--min-result", type=int)
+    parser.add_argument("--max-operand", type=int, help="largest number shown in a problem")
+    parser.add_argument("--format", choices=["text", "csv"], default="text")
+    parser.add_argument("--no-answers", action="store_true", help="leave out the answer key")
+    parser.add_argument("--output", help="file to write, standard output if not given")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    try:
+        problems = generate_worksheet(
+            args.count, args.operations, np.random.default_rng(args.seed),
+            first=None if args.first is None else np.arange(args.first[0], args.first[1] + 1),
+            second=None if args.second is None else np.arange(args.second[0], args.second[1] + 1),
+            max_result=args.max_result, min_result=args.min_result, max_operand=args.max_operand)
+    except ValueError as error:
+        # Each operation gets an even share of --count, so name the share that did not fit
+        parser.error(f"--count {args.count} asks for {-(-args.count // len(args.operations))} problems per operation: "
+                     f"{error}; lower --count or widen the ranges")
+    generated = time.perf_counter() - start
+    
+    output = sys.stdout if args.output is None else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if args.format == "csv":
+            write_csv(problems, output)
+        else:
+            write_sheet(problems, output, answers=not args.no_answers)
+    finally:
+        if args.output is not None:
+            output.close()
+    print(f"{len(problems)} problems generated in {generated * 1000:.0f} ms, "
+          f"written in {(time.perf_counter() - start - generated) * 1000:.0f} ms", file=sys.stderr)